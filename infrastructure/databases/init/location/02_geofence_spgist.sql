@@ -0,0 +1,8 @@
+-- Location Service: SP-GiST index for geofence point-in-polygon lookups
+-- Overlapping geofences (city/zone hierarchies) are looked up faster through
+-- SP-GiST than GiST. Requires PostGIS 3+. Safe to run against an existing
+-- database; the planner chooses between the two indexes automatically.
+-- idx_geofences_boundary (GiST) can be dropped once EXPLAIN ANALYZE on the
+-- _check_geofences query confirms this index is used.
+
+CREATE INDEX IF NOT EXISTS idx_geofences_boundary_spgist ON geofences USING SPGIST(boundary);
@@ -0,0 +1,13 @@
+-- Notification Service: composite index for the alert list endpoint
+-- GET /alerts filters on vehicle_id/status/severity and pages newest first
+-- by (created_at, id) (keyset pagination through the cursor parameter; id
+-- breaks created_at ties). idx_alerts_filter serves the filtered case and
+-- idx_alerts_created_at_id the unfiltered one.
+-- CONCURRENTLY avoids locking writes when applied to an existing database;
+-- it cannot run inside a transaction block.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_alerts_filter
+    ON alerts (vehicle_id, status, severity, created_at DESC, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_alerts_created_at_id
+    ON alerts (created_at DESC, id DESC);
@@ -0,0 +1,47 @@
+"""Publishes location alerts to a Redis Stream for the notification service"""
+import logging
+from typing import Any, Dict, List, Optional
+
+import orjson
+import redis.asyncio as redis
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+ALERT_STREAM = "fleet:alerts"
+# Approximate cap on stream length; trimming happens in whole macro-nodes
+ALERT_STREAM_MAXLEN = 100_000
+
+_redis: Optional[redis.Redis] = None
+
+async def init_alert_stream() -> None:
+    """Create the Redis client used for publishing alerts"""
+    global _redis
+    if _redis is None:
+        _redis = redis.from_url(settings.EVENT_STREAM_URL)
+
+async def close_alert_stream() -> None:
+    """Close the Redis client"""
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+
+async def publish_alerts(alerts: List[Dict[str, Any]]) -> None:
+    """Append alerts to the stream, pipelined into one round-trip"""
+    if _redis is None or not alerts:
+        return
+    
+    try:
+        async with _redis.pipeline(transaction=False) as pipe:
+            for alert in alerts:
+                pipe.xadd(
+                    ALERT_STREAM,
+                    {"data": orjson.dumps(alert)},
+                    maxlen=ALERT_STREAM_MAXLEN,
+                    approximate=True
+                )
+            await pipe.execute()
+    except Exception as e:
+        logger.error("Error publishing %d alerts: %s", len(alerts), e)
@@ -21,6 +21,8 @@ class Settings(BaseSettings):
 
     # Redis Configuration
     REDIS_URL: str
+    # Shared by location and notification service for the alert stream
+    EVENT_STREAM_URL: str = "redis://redis:6379/1"
 
     # MQTT Configuration
     MQTT_BROKER_URL: str
@@ -28,6 +30,11 @@ class Settings(BaseSettings):
     MQTT_PASSWORD: str
     MQTT_CLIENT_ID: str = "location-service"
 
+    # Location Processing
+    LOCATION_BATCH_SIZE: int = 50
+    LOCATION_FLUSH_INTERVAL_MS: int = 200
+    GEOFENCE_CACHE_REFRESH_SECONDS: int = 30
+
     # Service URLs
     VEHICLE_SERVICE_URL: str
 
@@ -11,10 +11,13 @@ from typing import Dict, Any
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-from .database import init_db, close_db, get_db
+from sqlalchemy import text
+
+from .database import init_db, close_db, get_db, async_engine
 from .config import settings
 from .routes import location_router, geofence_router, health
 from .mqtt_handler import mqtt_handler
+from .alert_stream import init_alert_stream, close_alert_stream
 from prometheus_fastapi_instrumentator import Instrumentator
 
 @asynccontextmanager
@@ -23,6 +26,16 @@ async def lifespan(app: FastAPI):
     logger.info("🌍 Location Service starting up...")
     await init_db()
 
+    # PostGIS version doesn't change at runtime; resolve it once for /health
+    try:
+        async with async_engine.connect() as conn:
+            app.state.postgis_version = (await conn.execute(text("SELECT PostGIS_Version()"))).scalar() or "unknown"
+    except Exception as e:
+        logger.error(f"❌ Could not read PostGIS version: {str(e)}")
+        app.state.postgis_version = "unknown"
+
+    await init_alert_stream()
+
     # Connect to MQTT broker
     try:
         await mqtt_handler.connect()
@@ -37,6 +50,7 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("🔄 Location Service shutting down...")
     await mqtt_handler.disconnect()
+    await close_alert_stream()
     await close_db()
     logger.info("✅ Location Service shutdown completed")
 
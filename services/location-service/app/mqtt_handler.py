@@ -2,11 +2,14 @@
 import asyncio
 import json
 import logging
+import re
+import time
 from typing import Dict, Any, Optional, Callable
 from datetime import datetime
 import uuid
 
 import aiomqtt
+import orjson
 from pydantic import BaseModel, ValidationError
 
 from .config import settings
@@ -15,6 +18,13 @@ from .services.location_processor import LocationProcessor
 
 logger = logging.getLogger(__name__)
 
+# Topic router: one compiled match per message, the named group picks the handler
+TOPIC_RE = re.compile(
+    r'^fleet/(?:vehicles/[^/]+/(?:(?P<location>location)|(?P<status>status))'
+    r'|devices/[^/]+/(?P<heartbeat>heartbeat)'
+    r'|system/(?P<broadcast>broadcast))$'
+)
+
 class GPSMessage(BaseModel):
     """GPS message format from devices"""
     device_id: str
@@ -43,6 +53,18 @@ class MQTTHandler:
         self.message_handlers: Dict[str, Callable] = {}
         self.reconnect_interval = 5  # seconds
         self.max_reconnect_attempts = 10
+        # Outgoing commands are queued and published by a single task
+        self._pub_queue: asyncio.Queue = asyncio.Queue(maxsize=10_000)
+        self._publisher_task: Optional[asyncio.Task] = None
+        self.publish_batch_size = 100
+        # Single long-lived consumer for incoming messages
+        self._consumer_task: Optional[asyncio.Task] = None
+        self._topic_handlers: Dict[str, Callable] = {
+            "location": self._handle_location_message,
+            "status": self._handle_status_message,
+            "heartbeat": self._handle_heartbeat_message,
+            "broadcast": self._handle_broadcast_message,
+        }
         
     async def connect(self):
         """Connect to MQTT broker"""
@@ -69,8 +91,16 @@ class MQTTHandler:
             
             logger.info(f"✅ MQTT connected to {host}:{port}")
             
-            # Start message processing task
-            asyncio.create_task(self._process_messages())
+            # Start message processing task, replacing any previous consumer.
+            # On reconnect this runs inside the old consumer, which exits by itself.
+            old_consumer = self._consumer_task
+            if old_consumer and not old_consumer.done() and old_consumer is not asyncio.current_task():
+                old_consumer.cancel()
+            self._consumer_task = asyncio.create_task(self._process_messages())
+            
+            # Start command publisher task (kept across reconnects)
+            if self._publisher_task is None or self._publisher_task.done():
+                self._publisher_task = asyncio.create_task(self._publisher_loop())
             
         except Exception as e:
             logger.error(f"❌ MQTT connection failed: {str(e)}")
@@ -79,6 +109,16 @@ class MQTTHandler:
     
     async def disconnect(self):
         """Disconnect from MQTT broker"""
+        tasks = [t for t in (self._consumer_task, self._publisher_task) if t]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._consumer_task = None
+        self._publisher_task = None
+        
+        # Process and store locations still waiting in the queue
+        await self.location_processor.shutdown()
+        
         if self.client:
             try:
                 await self.client.__aexit__(None, None, None)
@@ -89,16 +129,17 @@ class MQTTHandler:
     
     async def _subscribe_to_topics(self):
         """Subscribe to MQTT topics for GPS data"""
+        # QoS 1 where delivery matters, QoS 0 for high-rate, loss-tolerant streams
         topics = [
-            "fleet/vehicles/+/location",  # Individual vehicle locations
-            "fleet/vehicles/+/status",    # Vehicle status updates
-            "fleet/devices/+/heartbeat",  # Device heartbeats
-            "fleet/system/broadcast"      # System broadcasts
+            ("fleet/vehicles/+/location", 1),  # Individual vehicle locations
+            ("fleet/vehicles/+/status", 1),    # Vehicle status updates
+            ("fleet/devices/+/heartbeat", 0),  # Device heartbeats
+            ("fleet/system/broadcast", 0)      # System broadcasts
         ]
         
-        for topic in topics:
-            await self.client.subscribe(topic)
-            logger.info(f"📡 Subscribed to MQTT topic: {topic}")
+        for topic, qos in topics:
+            await self.client.subscribe(topic, qos=qos)
+            logger.info(f"📡 Subscribed to MQTT topic: {topic} (QoS {qos})")
     
     async def _process_messages(self):
         """Process incoming MQTT messages"""
@@ -108,6 +149,7 @@ class MQTTHandler:
         except Exception as e:
             logger.error(f"Error processing MQTT messages: {str(e)}")
             if self.connected:
+                self.connected = False
                 await self._reconnect()
     
     async def _handle_message(self, message: aiomqtt.Message):
@@ -116,17 +158,12 @@ class MQTTHandler:
             topic = str(message.topic)
             payload = message.payload.decode('utf-8')
             
-            logger.debug(f"📥 MQTT message: {topic} -> {payload[:100]}...")
+            logger.debug("📥 MQTT message: %s -> %.100s...", topic, payload)
             
             # Route message based on topic
-            if "/location" in topic:
-                await self._handle_location_message(topic, payload)
-            elif "/status" in topic:
-                await self._handle_status_message(topic, payload)  
-            elif "/heartbeat" in topic:
-                await self._handle_heartbeat_message(topic, payload)
-            elif "/broadcast" in topic:
-                await self._handle_broadcast_message(topic, payload)
+            match = TOPIC_RE.match(topic)
+            if match:
+                await self._topic_handlers[match.lastgroup](topic, payload)
             else:
                 logger.warning(f"Unknown MQTT topic: {topic}")
                 
@@ -137,10 +174,10 @@ class MQTTHandler:
         """Handle GPS location messages"""
         try:
             # Parse JSON payload
-            data = json.loads(payload)
+            data = orjson.loads(payload)
             
-            # Validate GPS message
-            gps_message = GPSMessage(**data)
+            # Validate GPS message (model_validate runs entirely in pydantic-core)
+            gps_message = GPSMessage.model_validate(data)
             
             # Convert to LocationData for processing
             location_data = LocationData(
@@ -158,10 +195,10 @@ class MQTTHandler:
                 raw_data=data
             )
             
-            # Process location data
-            await self.location_processor.process_location(location_data)
+            # Queue location data for batched processing
+            await self.location_processor.enqueue(location_data)
             
-            logger.info(f"📍 Processed GPS location for vehicle {gps_message.vehicle_id}")
+            logger.debug("📍 Queued GPS location for vehicle %s", gps_message.vehicle_id)
             
         except ValidationError as e:
             logger.error(f"Invalid GPS message format: {str(e)}")
@@ -177,7 +214,7 @@ class MQTTHandler:
             vehicle_id = data.get('vehicle_id')
             status = data.get('status')
             
-            logger.info(f"🚗 Vehicle {vehicle_id} status: {status}")
+            logger.debug("🚗 Vehicle %s status: %s", vehicle_id, status)
             
             # TODO: Update vehicle status in database
             # TODO: Generate status change events
@@ -194,7 +231,7 @@ class MQTTHandler:
             battery_level = data.get('battery_level')
             signal_strength = data.get('signal_strength')
             
-            logger.debug(f"💓 Device {device_id} heartbeat - Battery: {battery_level}%")
+            logger.debug("💓 Device %s heartbeat - Battery: %s%%", device_id, battery_level)
             
             # TODO: Update device last heartbeat in database
             # TODO: Check for offline devices
@@ -235,29 +272,53 @@ class MQTTHandler:
         if not self.connected:
             logger.error("❌ MQTT reconnection failed after maximum attempts")
     
-    async def publish_command(self, vehicle_id: str, command: str, data: Dict[str, Any]):
-        """Send command to vehicle device"""
+    async def publish_command(self, vehicle_id: str, command: str, data: Dict[str, Any], qos: int = 1):
+        """Queue command for a vehicle device, published by the publisher task
+        
+        Commands default to QoS 1; pass qos=0 for fire-and-forget commands
+        that do not need a broker acknowledgement.
+        """
         if not self.connected or not self.client:
             logger.error("MQTT not connected - cannot send command")
             return False
         
         try:
             topic = f"fleet/vehicles/{vehicle_id}/commands"
-            payload = json.dumps({
+            # Send time as integer epoch microseconds: no datetime is built and
+            # orjson writes an int far faster than an ISO string
+            payload = orjson.dumps({
                 'command': command,
                 'data': data,
-                'timestamp': datetime.utcnow().isoformat(),
+                'ts': time.time_ns() // 1000,
                 'sender': 'location-service'
             })
             
-            await self.client.publish(topic, payload)
-            logger.info(f"📤 Sent command to {vehicle_id}: {command}")
+            self._pub_queue.put_nowait((topic, payload, qos))
+            logger.debug("📤 Queued command for %s: %s", vehicle_id, command)
             return True
             
+        except asyncio.QueueFull:
+            logger.error("MQTT publish queue full - dropping command %s for %s", command, vehicle_id)
+            return False
         except Exception as e:
             logger.error(f"Error sending MQTT command: {str(e)}")
             return False
     
+    async def _publisher_loop(self):
+        """Drain the publish queue, sending up to publish_batch_size items per wakeup"""
+        while True:
+            batch = [await self._pub_queue.get()]
+            while len(batch) < self.publish_batch_size and not self._pub_queue.empty():
+                batch.append(self._pub_queue.get_nowait())
+            
+            for topic, payload, qos in batch:
+                try:
+                    await self.client.publish(topic, payload, qos=qos)
+                except Exception as e:
+                    logger.error(f"Error publishing MQTT message to {topic}: {str(e)}")
+                finally:
+                    self._pub_queue.task_done()
+    
     def is_connected(self) -> bool:
         """Check if MQTT client is connected"""
         return self.connected
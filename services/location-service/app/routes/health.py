@@ -1,5 +1,5 @@
 """Health check endpoints for location service"""
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from ..database import get_db
@@ -9,15 +9,13 @@ router = APIRouter()
 
 @router.get("")
 @router.get("/")
-async def health_check(db: Session = Depends(get_db)):
+async def health_check(request: Request, db: Session = Depends(get_db)):
     """Health check endpoint"""
     try:
-        # Test database connection with PostGIS
+        # Test database connection (PostGIS version is resolved at startup)
         db.execute(text("SELECT 1"))
-        # Test PostGIS extension
-        result = db.execute(text("SELECT PostGIS_Version()")).fetchone()
         db_status = "healthy"
-        postgis_version = result[0] if result else "unknown"
+        postgis_version = getattr(request.app.state, "postgis_version", "unknown")
     except Exception as e:
         db_status = f"unhealthy: {str(e)}"
         postgis_version = "error"
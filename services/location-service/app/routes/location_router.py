@@ -1,10 +1,11 @@
 """Location tracking routes"""
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 import datetime
 import uuid
+import msgspec
 
 from ..database import get_db
 
@@ -20,7 +21,8 @@ class LocationResponse(BaseModel):
     address: Optional[str]
     recorded_at: datetime.datetime
 
-class LocationCreateRequest(BaseModel):
+class LocationCreateRequest(msgspec.Struct):
+    """Location body for POST /locations/, decoded with msgspec (hot path for devices over HTTP)"""
     vehicle_id: str
     latitude: float
     longitude: float
@@ -29,6 +31,15 @@ class LocationCreateRequest(BaseModel):
     altitude: Optional[float] = None
     accuracy: Optional[float] = None
 
+_location_decoder = msgspec.json.Decoder(LocationCreateRequest)
+
+async def location_create_body(request: Request) -> LocationCreateRequest:
+    """Decode and validate the request body without going through Pydantic"""
+    try:
+        return _location_decoder.decode(await request.body())
+    except (msgspec.ValidationError, msgspec.DecodeError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
 @router.get("/current")
 async def get_current_locations(
     vehicle_id: Optional[str] = Query(None),
@@ -68,7 +79,10 @@ async def get_location_history(
     }
 
 @router.post("/")
-async def create_location(request: LocationCreateRequest, db: Session = Depends(get_db)):
+async def create_location(
+    request: LocationCreateRequest = Depends(location_create_body),
+    db: Session = Depends(get_db)
+):
     """Create new location record"""
     # TODO: Implement actual database insertion
     return {
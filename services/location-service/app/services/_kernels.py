@@ -0,0 +1,35 @@
+"""Numba-compiled geo kernels for location processing"""
+import math
+
+import numpy as np
+from numba import njit, prange
+
+EARTH_RADIUS_M = 6371000.0
+
+# Every fast-math flag except nnan/ninf: batches use NaN for "no previous fix"
+# and those entries must stay NaN instead of being optimized away.
+_FASTMATH = {"nsz", "arcp", "contract", "afn", "reassoc"}
+
+
+@njit(cache=True, fastmath=_FASTMATH)
+def haversine(lat1, lng1, lat2, lng2):
+    """Haversine distance in meters between two GPS coordinates"""
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    delta_lat = lat2_rad - lat1_rad
+    delta_lng = math.radians(lng2 - lng1)
+
+    a = (math.sin(delta_lat / 2) ** 2 +
+         math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lng / 2) ** 2)
+
+    return EARTH_RADIUS_M * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+@njit(cache=True, fastmath=_FASTMATH, parallel=True, boundscheck=False)
+def haversine_batch(lat1, lng1, lat2, lng2):
+    """Haversine distances in meters for 1D float64 arrays of coordinate pairs"""
+    n = lat1.shape[0]
+    out = np.empty(n, dtype=np.float64)
+    for i in prange(n):
+        out[i] = haversine(lat1[i], lng1[i], lat2[i], lng2[i])
+    return out
@@ -0,0 +1,130 @@
+"""In-process cache of active geofences for point-in-polygon checks"""
+import logging
+import math
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+import shapely
+from shapely import STRtree
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# Integer grid cells used to pre-filter geofences before any geometric test
+CELL_SIZE_DEG = 0.01  # ~1.1 km at the equator
+CELLS_PER_ROW = math.ceil(360 / CELL_SIZE_DEG)
+# Geofences whose bounding box spans more cells than this are looked up through the STRtree
+MAX_CELLS_PER_FENCE = 256
+
+_SQL_ACTIVE_GEOFENCES = text("""
+    SELECT id, name, type, max_speed, ST_AsBinary(boundary)
+    FROM geofences
+    WHERE is_active = true
+""")
+
+def cell_id(latitude: float, longitude: float) -> int:
+    """Integer id of the grid cell containing a point"""
+    row = int((latitude + 90) // CELL_SIZE_DEG)
+    col = int((longitude + 180) // CELL_SIZE_DEG)
+    return row * CELLS_PER_ROW + col
+
+class GeofenceInfo(NamedTuple):
+    """Geofence attributes needed by location processing"""
+    id: str
+    name: str
+    type: str
+    max_speed: Optional[float]
+
+class GeofenceCache:
+    """Active geofences held as prepared Shapely geometries behind an STRtree.
+    
+    Boundaries are loaded once per refresh interval. Candidates for a point come
+    from an integer grid-cell table (a dict lookup) plus a bounding-box query on
+    an STRtree of the few geofences too large to grid; only those candidates get
+    the exact prepared covers() test. No database round-trip is involved.
+    """
+    
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self._fences: List[GeofenceInfo] = []
+        self._geometries: np.ndarray = np.empty(0, dtype=object)
+        self._index: Optional[STRtree] = None
+        self._cells: Dict[int, np.ndarray] = {}
+        self._oversized: np.ndarray = np.empty(0, dtype=np.intp)
+        self._loaded_at: Optional[float] = None
+    
+    @property
+    def is_loaded(self) -> bool:
+        return self._index is not None
+    
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_interval
+    
+    async def refresh(self, db: AsyncSession):
+        """Reload active geofences from the database and rebuild the index"""
+        try:
+            rows = (await db.execute(_SQL_ACTIVE_GEOFENCES)).fetchall()
+            
+            fences = [
+                GeofenceInfo(
+                    id=str(row[0]),
+                    name=row[1],
+                    type=row[2],
+                    max_speed=float(row[3]) if row[3] is not None else None
+                )
+                for row in rows
+            ]
+            geometries = shapely.from_wkb([bytes(row[4]) for row in rows])
+            shapely.prepare(geometries)
+            
+            cells, oversized = self._build_cells(geometries)
+            
+            self._fences = fences
+            self._geometries = geometries
+            self._cells = cells
+            self._oversized = oversized
+            self._index = STRtree(geometries[oversized])
+            logger.debug("Loaded %d active geofences into cache", len(fences))
+        except Exception as e:
+            logger.error(f"Error loading geofences into cache: {str(e)}")
+        finally:
+            # Retry after the interval rather than on every batch if the load failed
+            self._loaded_at = time.monotonic()
+    
+    def _build_cells(self, geometries: np.ndarray):
+        """Map grid cell ids to the geofences whose bounding box overlaps them"""
+        buckets: Dict[int, List[int]] = {}
+        oversized: List[int] = []
+        
+        for i, (min_lng, min_lat, max_lng, max_lat) in enumerate(shapely.bounds(geometries)):
+            first = cell_id(min_lat, min_lng)
+            last = cell_id(max_lat, max_lng)
+            first_row, first_col = divmod(first, CELLS_PER_ROW)
+            last_row, last_col = divmod(last, CELLS_PER_ROW)
+            
+            if (last_row - first_row + 1) * (last_col - first_col + 1) > MAX_CELLS_PER_FENCE:
+                oversized.append(i)
+                continue
+            
+            for row in range(first_row, last_row + 1):
+                for col in range(first_col, last_col + 1):
+                    buckets.setdefault(row * CELLS_PER_ROW + col, []).append(i)
+        
+        cells = {cell: np.array(indices, dtype=np.intp) for cell, indices in buckets.items()}
+        return cells, np.array(oversized, dtype=np.intp)
+    
+    def lookup(self, latitude: float, longitude: float) -> List[GeofenceInfo]:
+        """Return the cached geofences covering a point"""
+        candidates = self._cells.get(cell_id(latitude, longitude))
+        if len(self._oversized):
+            large = self._oversized[self._index.query(shapely.Point(longitude, latitude))]
+            candidates = large if candidates is None else np.concatenate((candidates, large))
+        if candidates is None or len(candidates) == 0:
+            return []
+        
+        # Test the raw coordinates against the prepared polygons: no Point is built
+        # per candidate, and for a point "intersects" is the same test as "covers"
+        hits = shapely.intersects_xy(self._geometries[candidates], longitude, latitude)
+        return [self._fences[i] for i in candidates[hits]]
@@ -1,115 +1,273 @@
 """Location data processing service"""
 import asyncio
 import logging
+import math
+import os
+import uuid
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+import numpy as np
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
-from ..database import SessionLocal
+from ..database import AsyncSessionLocal
+from ..alert_stream import publish_alerts
+from ._kernels import haversine_batch
+from .geofence_cache import GeofenceCache, GeofenceInfo
 from ..models.location_data import LocationData, ProcessedLocation, GeofenceViolation
 from ..config import settings
 
 logger = logging.getLogger(__name__)
 
+# Below this many points the NumPy path beats the JIT kernel's dispatch/threading cost
+JIT_BATCH_THRESHOLD = 32
+
+# Initial row capacity of the last-location arrays (doubled when full)
+INITIAL_VEHICLE_CAPACITY = 1024
+
+# Accepted window for a fix's recorded_at around the current time
+MAX_FUTURE_SKEW = timedelta(minutes=5)
+MAX_FIX_AGE = timedelta(days=7)
+MAX_FUTURE_SKEW_S = MAX_FUTURE_SKEW.total_seconds()
+MAX_FIX_AGE_S = MAX_FIX_AGE.total_seconds()
+
+# Statements are built once at import so SQLAlchemy's compiled cache is hit on every call
+# The && bounding-box test is answered by the spatial index,
+# exact ST_Covers only runs on the surviving candidates
+_SQL_GEOFENCES_AT_POINT = text("""
+    SELECT id, name, type, max_speed
+    FROM geofences 
+    WHERE is_active = true
+    AND boundary && ST_SetSRID(ST_MakePoint(:lng, :lat), 4326)
+    AND ST_Covers(boundary, ST_SetSRID(ST_MakePoint(:lng, :lat), 4326))
+""")
+
+# Inserts a whole batch into locations and upserts the newest fix per vehicle into
+# current_locations in one statement. Every column is bound as one array
+_SQL_PERSIST_LOCATIONS = text("""
+    WITH batch AS (
+        SELECT * FROM unnest(
+            CAST(:id AS uuid[]), CAST(:vehicle_id AS uuid[]), CAST(:device_id AS uuid[]),
+            CAST(:lat AS float8[]), CAST(:lng AS float8[]), CAST(:altitude AS float8[]),
+            CAST(:speed AS float8[]), CAST(:heading AS int[]), CAST(:accuracy AS float8[]),
+            CAST(:satellites AS int[]), CAST(:hdop AS float8[]), CAST(:odometer AS float8[]),
+            CAST(:fuel_level AS float8[]), CAST(:battery_voltage AS float8[]),
+            CAST(:temperature AS float8[]), CAST(:engine_status AS text[]),
+            CAST(:address AS text[]), CAST(:raw_data AS text[]),
+            CAST(:recorded_at AS timestamptz[]), CAST(:received_at AS timestamptz[]),
+            CAST(:signal_quality AS int[])
+        ) AS b(
+            id, vehicle_id, device_id, lat, lng, altitude, speed, heading, accuracy,
+            satellites, hdop, odometer, fuel_level, battery_voltage, temperature,
+            engine_status, address, raw_data, recorded_at, received_at, signal_quality
+        )
+    ), ins AS (
+        INSERT INTO locations (
+            id, vehicle_id, device_id, position, altitude, speed, heading,
+            accuracy, satellites, hdop, odometer, fuel_level, battery_voltage,
+            temperature, engine_status, address, raw_data, recorded_at, received_at
+        )
+        SELECT
+            id, vehicle_id, device_id, ST_SetSRID(ST_MakePoint(lng, lat), 4326),
+            altitude, speed, heading, accuracy, satellites, hdop,
+            odometer, fuel_level, battery_voltage, temperature, engine_status,
+            address, raw_data::jsonb, recorded_at, received_at
+        FROM batch
+    )
+    INSERT INTO current_locations (
+        vehicle_id, position, speed, heading, address, last_update, is_online, signal_quality
+    )
+    SELECT DISTINCT ON (vehicle_id)
+        vehicle_id, ST_SetSRID(ST_MakePoint(lng, lat), 4326),
+        speed, heading, address, recorded_at, true, signal_quality
+    FROM batch
+    ORDER BY vehicle_id, recorded_at DESC
+    ON CONFLICT (vehicle_id) DO UPDATE SET
+        position = EXCLUDED.position,
+        speed = EXCLUDED.speed,
+        heading = EXCLUDED.heading,
+        address = EXCLUDED.address,
+        last_update = EXCLUDED.last_update,
+        is_online = EXCLUDED.is_online,
+        signal_quality = EXCLUDED.signal_quality,
+        updated_at = CURRENT_TIMESTAMP
+""")
+
 class LocationProcessor:
     """Processes GPS location data from devices"""
     
     def __init__(self):
-        self.last_locations: Dict[str, LocationData] = {}  # Cache last location per vehicle
+        # Last location per vehicle, stored column-wise: vehicle_id -> row in the arrays
+        self._vehicle_idx: Dict[str, int] = {}
+        self._last_lat = np.empty(INITIAL_VEHICLE_CAPACITY, dtype=np.float64)
+        self._last_lng = np.empty(INITIAL_VEHICLE_CAPACITY, dtype=np.float64)
+        self._last_ts = np.empty(INITIAL_VEHICLE_CAPACITY, dtype=np.float64)  # epoch seconds
         self.processing_queue = asyncio.Queue()
+        # Processed locations waiting to be written in one batch
+        self._store_buffer: List[ProcessedLocation] = []
+        self._drain_task: Optional[asyncio.Task] = None
+        self.batch_size = settings.LOCATION_BATCH_SIZE
+        self.flush_interval = settings.LOCATION_FLUSH_INTERVAL_MS / 1000
+        self.geofence_cache = GeofenceCache(settings.GEOFENCE_CACHE_REFRESH_SECONDS)
+    
+    async def enqueue(self, location_data: LocationData):
+        """Queue incoming GPS location data for batched processing"""
+        if self._drain_task is None or self._drain_task.done():
+            self._drain_task = asyncio.create_task(self._drain_loop())
+        await self.processing_queue.put(location_data)
+    
+    async def _drain_loop(self):
+        """Collect up to batch_size locations (waiting at most flush_interval) and process them together"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.processing_queue.get()]
+            deadline = loop.time() + self.flush_interval
+            
+            while len(batch) < self.batch_size:
+                if not self.processing_queue.empty():
+                    batch.append(self.processing_queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.processing_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                await self.process_batch(batch)
+            except Exception as e:
+                logger.error(f"Error processing location batch: {str(e)}")
+    
+    async def process_batch(self, batch: List[LocationData]) -> List[ProcessedLocation]:
+        """Process a batch of GPS locations with one distance computation and one storage flush"""
+        results: List[ProcessedLocation] = []
+        valid: List[LocationData] = []
         
-    async def process_location(self, location_data: LocationData) -> ProcessedLocation:
-        """Process incoming GPS location data"""
-        try:
-            # Validate location data
-            if not self._is_valid_location(location_data):
+        # Validate location data for the whole batch at once
+        n = len(batch)
+        is_valid = self._is_valid_batch(
+            np.fromiter((p.latitude for p in batch), np.float64, count=n),
+            np.fromiter((p.longitude for p in batch), np.float64, count=n),
+            np.fromiter((p.recorded_at.timestamp() for p in batch), np.float64, count=n),
+        )
+        for location_data, ok in zip(batch, is_valid):
+            if ok:
+                valid.append(location_data)
+            else:
                 logger.warning(f"Invalid location data for vehicle {location_data.vehicle_id}")
-                return ProcessedLocation(
+                results.append(ProcessedLocation(
                     location_data=location_data,
                     is_valid=False,
                     validation_errors=["Invalid GPS coordinates"]
-                )
+                ))
+        
+        if not valid:
+            return results
+        
+        # Distances from each vehicle's previous fix, computed for the whole batch at once
+        distances = self._distances_from_last(valid)
+        
+        # Only the newest fix per vehicle goes through geofence checks and alerting;
+        # older fixes in the same batch are still analyzed and stored as history
+        latest: Dict[str, int] = {}
+        for i, location_data in enumerate(valid):
+            j = latest.get(location_data.vehicle_id)
+            if j is None or location_data.recorded_at >= valid[j].recorded_at:
+                latest[location_data.vehicle_id] = i
+        latest_rows = set(latest.values())
+        
+        # Get database session
+        async with AsyncSessionLocal() as db:
+            if self.geofence_cache.is_stale():
+                await self.geofence_cache.refresh(db)
             
-            # Get database session
-            db = SessionLocal()
+            for i, (location_data, distance) in enumerate(zip(valid, distances)):
+                try:
+                    # Create processed location object
+                    processed = ProcessedLocation(location_data=location_data)
+                    
+                    # Analyze movement
+                    await self._analyze_movement(processed, db, float(distance))
+                    
+                    # Analyze trip patterns
+                    await self._analyze_trips(processed, db)
+                    
+                    if i in latest_rows:
+                        # Check geofences
+                        await self._check_geofences(processed, db)
+                        
+                        # Generate alerts if needed
+                        await self._generate_alerts(processed, db)
+                    
+                    # Cache for next processing
+                    self._remember_location(location_data)
+                    
+                    # Queue for batched storage (locations + current_locations)
+                    self._store_buffer.append(processed)
+                    results.append(processed)
+                    
+                    logger.debug("✅ Processed location for vehicle %s", location_data.vehicle_id)
+                except Exception as e:
+                    logger.error(f"Error processing location: {str(e)}")
+                    results.append(ProcessedLocation(
+                        location_data=location_data,
+                        is_valid=False,
+                        validation_errors=[f"Processing error: {str(e)}"]
+                    ))
             
-            try:
-                # Create processed location object
-                processed = ProcessedLocation(location_data=location_data)
-                
-                # Analyze movement
-                await self._analyze_movement(processed, db)
-                
-                # Check geofences
-                await self._check_geofences(processed, db)
-                
-                # Analyze trip patterns
-                await self._analyze_trips(processed, db)
-                
-                # Store location data
-                await self._store_location(processed, db)
-                
-                # Update current location cache
-                await self._update_current_location(processed, db)
-                
-                # Generate alerts if needed
-                await self._generate_alerts(processed, db)
-                
-                # Cache for next processing
-                self.last_locations[location_data.vehicle_id] = location_data
-                
-                logger.debug(f"✅ Processed location for vehicle {location_data.vehicle_id}")
-                return processed
-                
-            finally:
-                db.close()
-                
-        except Exception as e:
-            logger.error(f"Error processing location: {str(e)}")
-            return ProcessedLocation(
-                location_data=location_data,
-                is_valid=False,
-                validation_errors=[f"Processing error: {str(e)}"]
-            )
+            await self._flush_storage(db)
+        
+        # Hand alerts to the notification service through the Redis stream
+        await publish_alerts([alert for processed in results for alert in processed.alerts_triggered])
+        
+        return results
     
     def _is_valid_location(self, location: LocationData) -> bool:
         """Validate GPS coordinates"""
-        # Check coordinate ranges
-        if not (-90 <= location.latitude <= 90):
-            return False
-        if not (-180 <= location.longitude <= 180):
-            return False
-        
-        # Check for obvious invalid coordinates (0,0) unless actually there
-        if location.latitude == 0 and location.longitude == 0:
-            return False
-        
-        # Check timestamp is reasonable (not too far in future/past)
         now = datetime.utcnow()
-        if location.recorded_at > now + timedelta(minutes=5):
-            return False
-        if location.recorded_at < now - timedelta(days=7):
-            return False
-        
-        return True
+        return (
+            -90 <= location.latitude <= 90
+            and -180 <= location.longitude <= 180
+            # (0,0) is almost always an unset fix rather than a real position
+            and not (location.latitude == 0 and location.longitude == 0)
+            and now - MAX_FIX_AGE <= location.recorded_at <= now + MAX_FUTURE_SKEW
+        )
+    
+    def _is_valid_batch(self, lat: np.ndarray, lng: np.ndarray, ts: np.ndarray) -> np.ndarray:
+        """Vectorized _is_valid_location over coordinate and epoch-second timestamp arrays"""
+        now = datetime.utcnow().timestamp()
+        return (
+            (lat >= -90) & (lat <= 90)
+            & (lng >= -180) & (lng <= 180)
+            & ~((lat == 0) & (lng == 0))
+            & (ts >= now - MAX_FIX_AGE_S) & (ts <= now + MAX_FUTURE_SKEW_S)
+        )
     
-    async def _analyze_movement(self, processed: ProcessedLocation, db: Session):
-        """Analyze movement patterns and speed"""
+    async def _analyze_movement(self, processed: ProcessedLocation, db: AsyncSession,
+                                distance_from_last: Optional[float] = None):
+        """Analyze movement patterns and speed
+        
+        distance_from_last may be passed in when it was already computed for the batch.
+        """
         location = processed.location_data
         vehicle_id = location.vehicle_id
         
         # Get last location from cache
-        last_location = self.last_locations.get(vehicle_id)
+        row = self._vehicle_idx.get(vehicle_id)
         
-        if last_location:
+        if row is not None:
             # Calculate distance and time difference
-            processed.distance_from_last = self._calculate_distance(
-                last_location.latitude, last_location.longitude,
-                location.latitude, location.longitude
-            )
+            if distance_from_last is None:
+                distance_from_last = self._calculate_distance(
+                    float(self._last_lat[row]), float(self._last_lng[row]),
+                    location.latitude, location.longitude
+                )
+            processed.distance_from_last = distance_from_last
             
-            time_diff = (location.recorded_at - last_location.recorded_at).total_seconds()
+            time_diff = location.recorded_at.timestamp() - float(self._last_ts[row])
             processed.time_since_last = time_diff
             
             # Determine if moving (speed > 5 km/h or distance > 50m in last update)
@@ -126,34 +284,27 @@ class LocationProcessor:
                 processed.is_speeding = True
                 processed.speed_limit = default_speed_limit
     
-    async def _check_geofences(self, processed: ProcessedLocation, db: Session):
+    async def _check_geofences(self, processed: ProcessedLocation, db: AsyncSession):
         """Check for geofence violations"""
         location = processed.location_data
         
         try:
-            # Query active geofences (using PostGIS spatial queries)
-            query = text("""
-                SELECT id, name, type, boundary, max_speed
-                FROM geofences 
-                WHERE is_active = true
-                AND ST_Contains(boundary, ST_SetSRID(ST_MakePoint(:lng, :lat), 4326))
-            """)
-            
-            result = db.execute(query, {
-                'lat': location.latitude, 
-                'lng': location.longitude
-            })
+            # In-process prepared geometries; the database is only hit if the cache never loaded
+            if self.geofence_cache.is_loaded:
+                current_geofences = self.geofence_cache.lookup(location.latitude, location.longitude)
+            else:
+                current_geofences = await self._query_geofences(location, db)
             
-            current_geofences = result.fetchall()
-            processed.current_geofences = [row[0] for row in current_geofences]
+            processed.current_geofences = [geofence.id for geofence in current_geofences]
             
             # Check speed violations within geofences
-            for row in current_geofences:
-                geofence_id, name, geofence_type, boundary, max_speed = row
+            for geofence in current_geofences:
+                max_speed = geofence.max_speed
+                name = geofence.name
                 
                 if max_speed and location.speed and location.speed > max_speed:
                     violation = GeofenceViolation(
-                        geofence_id=str(geofence_id),
+                        geofence_id=geofence.id,
                         geofence_name=name,
                         violation_type="speed_violation",
                         vehicle_id=location.vehicle_id,
@@ -168,7 +319,24 @@ class LocationProcessor:
         except Exception as e:
             logger.error(f"Error checking geofences: {str(e)}")
     
-    async def _analyze_trips(self, processed: ProcessedLocation, db: Session):
+    async def _query_geofences(self, location: LocationData, db: AsyncSession) -> List[GeofenceInfo]:
+        """Query active geofences covering a location directly from PostGIS"""
+        result = await db.execute(_SQL_GEOFENCES_AT_POINT, {
+            'lat': location.latitude, 
+            'lng': location.longitude
+        })
+        
+        return [
+            GeofenceInfo(
+                id=str(row[0]),
+                name=row[1],
+                type=row[2],
+                max_speed=float(row[3]) if row[3] is not None else None
+            )
+            for row in result.fetchall()
+        ]
+    
+    async def _analyze_trips(self, processed: ProcessedLocation, db: AsyncSession):
         """Analyze trip patterns"""
         location = processed.location_data
         
@@ -177,117 +345,99 @@ class LocationProcessor:
         
         if processed.is_moving:
             # Check if this starts a new trip
-            last_location = self.last_locations.get(location.vehicle_id)
-            if not last_location or not getattr(processed, 'was_moving', True):
+            has_last_location = location.vehicle_id in self._vehicle_idx
+            if not has_last_location or not getattr(processed, 'was_moving', True):
                 processed.is_trip_start = True
                 # TODO: Create new trip in database
         else:
             # Check if this ends a trip
-            if location.vehicle_id in self.last_locations:
+            if location.vehicle_id in self._vehicle_idx:
                 processed.is_trip_end = True
                 # TODO: Close active trip in database
     
-    async def _store_location(self, processed: ProcessedLocation, db: Session):
-        """Store location data in database"""
-        location = processed.location_data
+    async def _flush_storage(self, db: AsyncSession):
+        """Write buffered locations and current positions, with a single commit"""
+        batch, self._store_buffer = self._store_buffer, []
+        if not batch:
+            return
         
         try:
-            # Insert into locations table (using raw SQL for PostGIS)
-            query = text("""
-                INSERT INTO locations (
-                    id, vehicle_id, device_id, position, altitude, speed, heading,
-                    accuracy, satellites, hdop, odometer, fuel_level, battery_voltage,
-                    temperature, engine_status, address, raw_data, recorded_at, received_at
-                ) VALUES (
-                    :id, :vehicle_id, :device_id, 
-                    ST_SetSRID(ST_MakePoint(:lng, :lat), 4326),
-                    :altitude, :speed, :heading, :accuracy, :satellites, :hdop,
-                    :odometer, :fuel_level, :battery_voltage, :temperature, :engine_status,
-                    :address, :raw_data, :recorded_at, :received_at
-                )
-            """)
-            
-            db.execute(query, {
-                'id': str(uuid.uuid4()),
-                'vehicle_id': location.vehicle_id,
-                'device_id': location.device_id,
-                'lat': location.latitude,
-                'lng': location.longitude,
-                'altitude': location.altitude,
-                'speed': location.speed,
-                'heading': location.heading,
-                'accuracy': location.accuracy,
-                'satellites': location.satellites,
-                'hdop': location.hdop,
-                'odometer': location.odometer,
-                'fuel_level': location.fuel_level,
-                'battery_voltage': location.battery_voltage,
-                'temperature': location.temperature,
-                'engine_status': location.engine_status,
-                'address': processed.address,
-                'raw_data': location.raw_data,
-                'recorded_at': location.recorded_at,
-                'received_at': datetime.utcnow()
-            })
-            
-            db.commit()
-            
+            await self._persist(batch, db)
+            await db.commit()
         except Exception as e:
-            logger.error(f"Error storing location: {str(e)}")
-            db.rollback()
+            logger.error(f"Error storing {len(batch)} locations: {str(e)}")
+            await db.rollback()
     
-    async def _update_current_location(self, processed: ProcessedLocation, db: Session):
-        """Update current location cache table"""
-        location = processed.location_data
+    async def shutdown(self):
+        """Stop the batch drainer and process any locations still queued"""
+        if self._drain_task:
+            self._drain_task.cancel()
+            await asyncio.gather(self._drain_task, return_exceptions=True)
+            self._drain_task = None
         
-        try:
-            # Upsert current location
-            query = text("""
-                INSERT INTO current_locations (
-                    vehicle_id, position, speed, heading, address, last_update, is_online, signal_quality
-                ) VALUES (
-                    :vehicle_id, ST_SetSRID(ST_MakePoint(:lng, :lat), 4326),
-                    :speed, :heading, :address, :last_update, true, :signal_quality
-                ) ON CONFLICT (vehicle_id) DO UPDATE SET
-                    position = EXCLUDED.position,
-                    speed = EXCLUDED.speed,
-                    heading = EXCLUDED.heading,
-                    address = EXCLUDED.address,
-                    last_update = EXCLUDED.last_update,
-                    is_online = EXCLUDED.is_online,
-                    signal_quality = EXCLUDED.signal_quality,
-                    updated_at = CURRENT_TIMESTAMP
-            """)
-            
-            signal_quality = 95 if location.satellites and location.satellites >= 8 else 70
-            
-            db.execute(query, {
-                'vehicle_id': location.vehicle_id,
-                'lat': location.latitude,
-                'lng': location.longitude,
-                'speed': location.speed,
-                'heading': location.heading,
-                'address': processed.address,
-                'last_update': location.recorded_at,
-                'signal_quality': signal_quality
-            })
-            
-            db.commit()
-            
-        except Exception as e:
-            logger.error(f"Error updating current location: {str(e)}")
-            db.rollback()
+        pending = []
+        while not self.processing_queue.empty():
+            pending.append(self.processing_queue.get_nowait())
+        if pending:
+            await self.process_batch(pending)
+        
+        if self._store_buffer:
+            async with AsyncSessionLocal() as db:
+                await self._flush_storage(db)
     
-    async def _generate_alerts(self, processed: ProcessedLocation, db: Session):
+    async def _persist(self, batch: List[ProcessedLocation], db: AsyncSession):
+        """Store a batch of locations and update current positions in one round-trip"""
+        received_at = datetime.utcnow()
+        columns: Dict[str, list] = {name: [] for name in (
+            'id', 'vehicle_id', 'device_id', 'lat', 'lng', 'altitude', 'speed', 'heading',
+            'accuracy', 'satellites', 'hdop', 'odometer', 'fuel_level', 'battery_voltage',
+            'temperature', 'engine_status', 'address', 'raw_data', 'recorded_at',
+            'received_at', 'signal_quality'
+        )}
+        for processed in batch:
+            location = processed.location_data
+            columns['vehicle_id'].append(location.vehicle_id)
+            columns['device_id'].append(location.device_id)
+            columns['lat'].append(location.latitude)
+            columns['lng'].append(location.longitude)
+            columns['altitude'].append(location.altitude)
+            columns['speed'].append(location.speed)
+            columns['heading'].append(location.heading)
+            columns['accuracy'].append(location.accuracy)
+            columns['satellites'].append(location.satellites)
+            columns['hdop'].append(location.hdop)
+            columns['odometer'].append(location.odometer)
+            columns['fuel_level'].append(location.fuel_level)
+            columns['battery_voltage'].append(location.battery_voltage)
+            columns['temperature'].append(location.temperature)
+            columns['engine_status'].append(location.engine_status)
+            columns['address'].append(processed.address)
+            columns['raw_data'].append(
+                orjson.dumps(location.raw_data).decode() if location.raw_data is not None else None
+            )
+            columns['recorded_at'].append(location.recorded_at)
+            columns['received_at'].append(location.received_at or received_at)
+        
+        # One urandom read for all ids instead of a uuid4() call per row
+        raw_ids = os.urandom(16 * len(batch))
+        columns['id'] = [uuid.UUID(bytes=raw_ids[i:i + 16], version=4) for i in range(0, len(raw_ids), 16)]
+        # Missing satellite counts become NaN and fall through to the low quality value
+        satellites = np.array(columns['satellites'], dtype=np.float64)
+        columns['signal_quality'] = np.where(satellites >= 8, 95, 70).tolist()
+        
+        await db.execute(_SQL_PERSIST_LOCATIONS, columns)
+    
+    async def _generate_alerts(self, processed: ProcessedLocation, db: AsyncSession):
         """Generate alerts based on processed location data"""
         alerts = []
+        location = processed.location_data
         
         # Speed violation alerts
         if processed.is_speeding:
             alerts.append({
                 'type': 'speed_violation',
                 'severity': 'high',
-                'message': f'Vehicle exceeded speed limit: {processed.location_data.speed} km/h'
+                'message': f'Vehicle exceeded speed limit: {location.speed} km/h'
             })
         
         # Geofence violation alerts
@@ -298,14 +448,18 @@ class LocationProcessor:
                 'message': violation.description
             })
         
-        # TODO: Send alerts to notification service via event system
+        # Context the notification service needs to route and display the alert
+        for alert in alerts:
+            alert['vehicle_id'] = location.vehicle_id
+            alert['latitude'] = location.latitude
+            alert['longitude'] = location.longitude
+            alert['recorded_at'] = location.recorded_at
         
+        # Published to the alert stream once the batch is processed
         processed.alerts_triggered = alerts
     
     def _calculate_distance(self, lat1: float, lng1: float, lat2: float, lng2: float) -> float:
         """Calculate distance between two GPS coordinates in meters"""
-        import math
-        
         # Haversine formula
         R = 6371000  # Earth's radius in meters
         
@@ -321,3 +475,73 @@ class LocationProcessor:
         c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
         
         return R * c
+    
+    def _calculate_distance_batch(self, lat1: np.ndarray, lng1: np.ndarray,
+                                  lat2: np.ndarray, lng2: np.ndarray) -> np.ndarray:
+        """Vectorized haversine distance in meters for arrays of coordinate pairs"""
+        if len(lat1) >= JIT_BATCH_THRESHOLD:
+            return haversine_batch(
+                np.ascontiguousarray(lat1, dtype=np.float64),
+                np.ascontiguousarray(lng1, dtype=np.float64),
+                np.ascontiguousarray(lat2, dtype=np.float64),
+                np.ascontiguousarray(lng2, dtype=np.float64),
+            )
+        
+        R = 6371000  # Earth's radius in meters
+        
+        lat1_rad = np.radians(lat1)
+        lat2_rad = np.radians(lat2)
+        delta_lat = lat2_rad - lat1_rad
+        delta_lng = np.radians(lng2 - lng1)
+        
+        a = (np.sin(delta_lat / 2) ** 2 +
+             np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(delta_lng / 2) ** 2)
+        
+        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+        
+        return R * c
+    
+    def _remember_location(self, location: LocationData):
+        """Store a vehicle's latest fix in the last-location arrays"""
+        row = self._vehicle_idx.get(location.vehicle_id)
+        if row is None:
+            row = len(self._vehicle_idx)
+            if row == len(self._last_lat):
+                capacity = 2 * row
+                self._last_lat = np.resize(self._last_lat, capacity)
+                self._last_lng = np.resize(self._last_lng, capacity)
+                self._last_ts = np.resize(self._last_ts, capacity)
+            self._vehicle_idx[location.vehicle_id] = row
+        
+        self._last_lat[row] = location.latitude
+        self._last_lng[row] = location.longitude
+        self._last_ts[row] = location.recorded_at.timestamp()
+    
+    def _distances_from_last(self, batch: List[LocationData]) -> np.ndarray:
+        """Distance of each location in a batch from the vehicle's previous fix.
+        
+        The previous fix is the cached last location, or the preceding entry for
+        the same vehicle within the batch. Entries without a previous fix are NaN.
+        """
+        n = len(batch)
+        lat = np.fromiter((p.latitude for p in batch), np.float64, count=n)
+        lng = np.fromiter((p.longitude for p in batch), np.float64, count=n)
+        
+        # Gather cached fixes with one fancy-indexing op per column
+        rows = np.fromiter((self._vehicle_idx.get(p.vehicle_id, -1) for p in batch), np.intp, count=n)
+        known = rows >= 0
+        prev_lat = np.full(n, np.nan)
+        prev_lng = np.full(n, np.nan)
+        prev_lat[known] = self._last_lat[rows[known]]
+        prev_lng[known] = self._last_lng[rows[known]]
+        
+        # A vehicle seen earlier in the same batch moves on from that fix instead
+        seen: Dict[str, int] = {}
+        for i, location in enumerate(batch):
+            j = seen.get(location.vehicle_id)
+            if j is not None:
+                prev_lat[i] = lat[j]
+                prev_lng[i] = lng[j]
+            seen[location.vehicle_id] = i
+        
+        return self._calculate_distance_batch(prev_lat, prev_lng, lat, lng)
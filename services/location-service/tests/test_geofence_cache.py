@@ -0,0 +1,119 @@
+"""Unit tests for the in-process geofence cache"""
+from datetime import datetime
+
+import pytest
+import shapely
+from shapely.geometry import box
+
+from app.models.location_data import LocationData, ProcessedLocation
+from app.services.geofence_cache import MAX_CELLS_PER_FENCE, CELL_SIZE_DEG, GeofenceCache
+from app.services.location_processor import LocationProcessor
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeSession:
+    """Returns fixed rows and records the statements it was given"""
+    def __init__(self, rows=(), error=None):
+        self.rows = list(rows)
+        self.error = error
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        self.statements.append((statement, params))
+        if self.error:
+            raise self.error
+        return FakeResult(self.rows)
+
+
+def geofence_row(fence_id, geometry, max_speed=None):
+    return (fence_id, f"fence {fence_id}", "speed_zone", max_speed, shapely.to_wkb(geometry))
+
+
+async def loaded_cache(*rows):
+    cache = GeofenceCache(refresh_interval=30)
+    await cache.refresh(FakeSession(rows))
+    return cache
+
+
+# A 2 x 2 cell square in Hanoi
+SMALL_FENCE = box(105.80, 21.00, 105.82, 21.02)
+# Spans far more than MAX_CELLS_PER_FENCE cells, so it lives in the STRtree
+LARGE_FENCE = box(100.0, 10.0, 110.0, 25.0)
+
+
+@pytest.mark.asyncio
+async def test_point_inside_fence():
+    cache = await loaded_cache(geofence_row("small", SMALL_FENCE, 40))
+
+    hits = cache.lookup(21.01, 105.81)
+
+    assert [fence.id for fence in hits] == ["small"]
+    assert hits[0].max_speed == 40.0
+
+
+@pytest.mark.asyncio
+async def test_point_on_fence_edge_is_covered():
+    cache = await loaded_cache(geofence_row("small", SMALL_FENCE))
+
+    assert [fence.id for fence in cache.lookup(21.00, 105.81)] == ["small"]
+    assert [fence.id for fence in cache.lookup(21.02, 105.82)] == ["small"]
+
+
+@pytest.mark.asyncio
+async def test_point_outside_fence():
+    # The point shares a grid cell with the fence's bounding box but is outside the polygon
+    triangle = shapely.Polygon([(105.80, 21.00), (105.82, 21.00), (105.80, 21.02)])
+    cache = await loaded_cache(geofence_row("triangle", triangle))
+
+    assert cache.lookup(21.019, 105.819) == []
+    # No fence in this cell at all
+    assert cache.lookup(21.50, 105.81) == []
+
+
+@pytest.mark.asyncio
+async def test_oversized_fence_goes_through_strtree():
+    cache = await loaded_cache(
+        geofence_row("small", SMALL_FENCE),
+        geofence_row("large", LARGE_FENCE)
+    )
+
+    min_lng, min_lat, max_lng, max_lat = LARGE_FENCE.bounds
+    assert ((max_lat - min_lat) / CELL_SIZE_DEG) * ((max_lng - min_lng) / CELL_SIZE_DEG) > MAX_CELLS_PER_FENCE
+    assert list(cache._oversized) == [1]
+    assert all(1 not in indices for indices in cache._cells.values())
+
+    assert sorted(fence.id for fence in cache.lookup(21.01, 105.81)) == ["large", "small"]
+    assert [fence.id for fence in cache.lookup(15.0, 102.0)] == ["large"]
+    assert cache.lookup(30.0, 102.0) == []
+
+
+@pytest.mark.asyncio
+async def test_never_loaded_cache_falls_back_to_sql():
+    cache = GeofenceCache(refresh_interval=30)
+    assert not cache.is_loaded
+    assert cache.is_stale()
+
+    # A failed load leaves the cache unloaded but waits out the interval before retrying
+    await cache.refresh(FakeSession(error=RuntimeError("database down")))
+    assert not cache.is_loaded
+    assert not cache.is_stale()
+
+    processor = LocationProcessor()
+    processor.geofence_cache = cache
+    processed = ProcessedLocation(location_data=LocationData(
+        vehicle_id="vehicle-1", latitude=21.01, longitude=105.81, speed=30, recorded_at=datetime.utcnow()
+    ))
+    db = FakeSession(rows=[("small", "fence small", "speed_zone", 40)])
+
+    await processor._check_geofences(processed, db)
+
+    assert len(db.statements) == 1
+    assert db.statements[0][1] == {"lat": 21.01, "lng": 105.81}
+    assert processed.current_geofences == ["small"]
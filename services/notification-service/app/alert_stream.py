@@ -0,0 +1,85 @@
+"""Consumes location alerts from the Redis Stream and fans them out over WebSocket"""
+import asyncio
+import logging
+import os
+import socket
+from typing import Optional
+
+import orjson
+import redis.asyncio as redis
+from redis.exceptions import ResponseError
+
+from .config import settings
+from .websocket_manager import websocket_manager
+
+logger = logging.getLogger(__name__)
+
+ALERT_STREAM = "fleet:alerts"
+CONSUMER_GROUP = "notification-service"
+READ_COUNT = 256
+READ_BLOCK_MS = 100
+
+_redis: Optional[redis.Redis] = None
+_consumer_task: Optional[asyncio.Task] = None
+
+async def init_alert_stream() -> None:
+    """Connect to Redis and start the alert consumer"""
+    global _redis, _consumer_task
+    if _redis is None:
+        _redis = redis.from_url(settings.EVENT_STREAM_URL)
+    if _consumer_task is None:
+        _consumer_task = asyncio.create_task(_consume_alerts())
+
+async def close_alert_stream() -> None:
+    """Stop the alert consumer and close the Redis client"""
+    global _redis, _consumer_task
+    if _consumer_task is not None:
+        _consumer_task.cancel()
+        await asyncio.gather(_consumer_task, return_exceptions=True)
+        _consumer_task = None
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+
+async def _ensure_group() -> None:
+    """Create the consumer group (and stream) if it doesn't exist yet"""
+    try:
+        await _redis.xgroup_create(ALERT_STREAM, CONSUMER_GROUP, id="$", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+async def _consume_alerts() -> None:
+    """Read alerts in batches and broadcast them to subscribed WebSocket clients"""
+    # One consumer per worker process; each entry is read by one worker, which broadcasts it to all
+    consumer = f"{socket.gethostname()}-{os.getpid()}"
+    
+    while True:
+        try:
+            await _ensure_group()
+            break
+        except Exception as e:
+            logger.error("Error creating alert consumer group: %s", e)
+            await asyncio.sleep(5)
+    
+    logger.info("📥 Consuming %s as %s/%s", ALERT_STREAM, CONSUMER_GROUP, consumer)
+    
+    while True:
+        try:
+            response = await _redis.xreadgroup(
+                CONSUMER_GROUP, consumer, {ALERT_STREAM: ">"},
+                count=READ_COUNT, block=READ_BLOCK_MS
+            )
+            for _, entries in response:
+                for _, fields in entries:
+                    try:
+                        await websocket_manager.broadcast_alert(orjson.loads(fields[b"data"]))
+                    except Exception as e:
+                        logger.error("Error broadcasting alert from stream: %s", e)
+                
+                await _redis.xack(ALERT_STREAM, CONSUMER_GROUP, *(entry_id for entry_id, _ in entries))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Error reading alert stream: %s", e)
+            await asyncio.sleep(1)
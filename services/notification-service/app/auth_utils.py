@@ -1,37 +1,92 @@
 """Authentication utilities for Notification Service"""
+import hashlib
 import httpx
 import logging
+import time
+from datetime import datetime, timezone
 from typing import Optional, Dict
 
+import orjson
+from cachetools import TTLCache
+
 from .config import settings
 
 logger = logging.getLogger(__name__)
 
+# Shared client so token validation reuses keep-alive connections to the auth service
+_client: Optional[httpx.AsyncClient] = None
+
+# Validated tokens: blake2b(token) -> (user_data, monotonic expiry)
+TOKEN_CACHE_TTL = 60  # seconds
+_token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=TOKEN_CACHE_TTL)
+
+def _token_cache_ttl(expires_at: Optional[str]) -> float:
+    """Seconds a validation result may be cached: TOKEN_CACHE_TTL, capped at token expiry"""
+    if not expires_at:
+        return TOKEN_CACHE_TTL
+    try:
+        exp = datetime.fromisoformat(expires_at.replace("Z", "+00:00"))
+        if exp.tzinfo is None:
+            exp = exp.replace(tzinfo=timezone.utc)
+        return min(TOKEN_CACHE_TTL, (exp - datetime.now(timezone.utc)).total_seconds())
+    except ValueError:
+        return TOKEN_CACHE_TTL
+
+async def init_http() -> None:
+    """Create the shared HTTP client for auth service calls"""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=settings.AUTH_SERVICE_URL,
+            timeout=5.0,
+            limits=httpx.Limits(max_keepalive_connections=100)
+        )
+
+async def close_http() -> None:
+    """Close the shared HTTP client"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 async def verify_websocket_token(token: Optional[str]) -> Optional[Dict]:
     """Verify JWT token for WebSocket connections"""
     if not token:
         return None
     
+    cache_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    cached = _token_cache.get(cache_key)
+    if cached is not None:
+        user_data, expires = cached
+        if time.monotonic() < expires:
+            return user_data
+        _token_cache.pop(cache_key, None)
+    
     try:
+        if _client is None:
+            await init_http()
+        
         # Call auth service to validate token
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"http://auth-service:8001/auth/validate-token",
-                json={"token": token},
-                timeout=5.0
-            )
-            
-            if response.status_code == 200:
-                token_data = response.json()
-                if token_data.get('valid'):
-                    return {
-                        'user_id': token_data.get('user_id'),
-                        'role': token_data.get('role'),
-                        'email': token_data.get('email')
-                    }
-            
-            logger.warning(f"Token validation failed: {response.status_code}")
-            return None
+        response = await _client.post(
+            "/auth/validate-token",
+            json={"token": token}
+        )
+        
+        if response.status_code == 200:
+            token_data = orjson.loads(response.content)
+            if token_data.get('valid'):
+                user_data = {
+                    'user_id': token_data.get('user_id'),
+                    'role': token_data.get('role'),
+                    'email': token_data.get('email')
+                }
+                ttl = _token_cache_ttl(token_data.get('expires_at'))
+                if ttl > 0:
+                    _token_cache[cache_key] = (user_data, time.monotonic() + ttl)
+                return user_data
+        
+        logger.warning(f"Token validation failed: {response.status_code}")
+        return None
             
     except httpx.TimeoutException:
         logger.error("Auth service timeout during token validation")
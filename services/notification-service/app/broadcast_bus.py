@@ -0,0 +1,80 @@
+"""Redis pub/sub fan-out so broadcasts reach WebSocket clients on every worker"""
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+import orjson
+import redis.asyncio as redis
+
+from .config import settings
+from .websocket_manager import websocket_manager
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_CHANNEL = "ws.broadcast"
+
+_redis: Optional[redis.Redis] = None
+_subscriber_task: Optional[asyncio.Task] = None
+
+async def init_broadcast_bus() -> None:
+    """Connect to Redis, start the local subscriber and route manager broadcasts through Redis"""
+    global _redis, _subscriber_task
+    if _redis is None:
+        _redis = redis.from_url(settings.REDIS_URL)
+    if _subscriber_task is None:
+        ready = asyncio.Event()
+        _subscriber_task = asyncio.create_task(_subscribe(ready))
+        await ready.wait()
+    websocket_manager.bus_publish = publish
+
+async def close_broadcast_bus() -> None:
+    """Stop the subscriber and close the Redis client"""
+    global _redis, _subscriber_task
+    websocket_manager.bus_publish = None
+    if _subscriber_task is not None:
+        _subscriber_task.cancel()
+        await asyncio.gather(_subscriber_task, return_exceptions=True)
+        _subscriber_task = None
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+
+async def publish(kind: str, data: Dict[str, Any]) -> None:
+    """Publish a broadcast to every worker, falling back to local delivery if Redis fails"""
+    try:
+        await _redis.publish(BROADCAST_CHANNEL, orjson.dumps({"kind": kind, "data": data}, option=orjson.OPT_NAIVE_UTC))
+    except Exception as e:
+        logger.error("Error publishing %s broadcast: %s", kind, e)
+        await _deliver(kind, data)
+
+async def _deliver(kind: str, data: Dict[str, Any]) -> None:
+    """Fan a broadcast out to this worker's connections"""
+    if kind == "alert":
+        await websocket_manager.deliver_alert(data)
+    elif kind == "location_update":
+        await websocket_manager.deliver_location_update(data)
+    else:
+        logger.warning("Unknown broadcast kind: %s", kind)
+
+async def _subscribe(ready: asyncio.Event) -> None:
+    """Deliver every message on the broadcast channel to local connections"""
+    while True:
+        pubsub = _redis.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(BROADCAST_CHANNEL)
+            ready.set()
+            async for message in pubsub.listen():
+                try:
+                    event = orjson.loads(message["data"])
+                    await _deliver(event["kind"], event["data"])
+                except Exception as e:
+                    logger.error("Error delivering broadcast: %s", e)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Broadcast subscriber error: %s", e)
+            # Don't hold up startup while Redis is unreachable; broadcasts fall back to local delivery
+            ready.set()
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
@@ -1,6 +1,6 @@
 # Notification Service Configuration
 
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import model_validator
 from typing import List, Union
 from functools import lru_cache
@@ -21,10 +21,20 @@ class Settings(BaseSettings):
 
     # Redis Configuration
     REDIS_URL: str
+    # Shared by location and notification service for the alert stream
+    EVENT_STREAM_URL: str = "redis://redis:6379/1"
+
+    # Service URLs
+    AUTH_SERVICE_URL: str = "http://auth-service:8001"
 
     # WebSocket Configuration
     WS_MAX_CONNECTIONS: int = 1000
     WS_HEARTBEAT_INTERVAL: int = 30
+    # Seconds without an inbound frame before a connection is closed; 0 disables,
+    # since the dashboard only listens and sends no heartbeat of its own
+    WS_IDLE_TIMEOUT: int = 0
+    # Messages kept per offline user and replayed on reconnect
+    WS_OFFLINE_QUEUE_SIZE: int = 10
 
     # Email Configuration (Optional)
     SMTP_HOST: str = ""
@@ -48,9 +58,8 @@ class Settings(BaseSettings):
                 values['CORS_ORIGINS'] = [origin.strip() for origin in cors_origins.split(",")]
         return values
 
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    # Frozen: settings are read-only once loaded and the cached instance is safe to share
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True, frozen=True)
 
 @lru_cache()
 def get_settings() -> Settings:
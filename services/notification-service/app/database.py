@@ -1,9 +1,11 @@
 # Notification Service Database Connection
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from contextlib import AsyncExitStack
+from typing import AsyncGenerator
 import logging
 import os
 
@@ -25,16 +27,31 @@ engine = create_engine(
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine with asyncpg for the HTTP routes, so requests don't block the event loop
+ASYNC_DATABASE_URL = DATABASE_URL.replace("+psycopg2", "+asyncpg")
+
+# No pre-ping round-trip on every checkout: the pool is warmed at startup and
+# connections are recycled before server-side idle timeouts can close them.
+# JIT is off because planning cost dominates the short alert queries.
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+    echo=os.getenv("DEBUG", "false").lower() == "true",
+    pool_pre_ping=False,
+    pool_recycle=1800,
+    connect_args={"server_settings": {"jit": "off"}}
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, class_=AsyncSession)
+
 # Base class for models
 Base = declarative_base()
 
-def get_db() -> Generator[Session, None, None]:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Database session dependency"""
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 async def init_db() -> None:
     """Initialize database"""
@@ -48,7 +65,17 @@ async def init_db() -> None:
         logger.error(f"❌ Database initialization failed: {e}")
         raise
 
+async def warm_pool() -> None:
+    """Open every pooled async connection up front so early requests skip the handshake"""
+    async with AsyncExitStack() as stack:
+        # Hold all connections at once, otherwise the pool keeps handing back the same one
+        for _ in range(async_engine.pool.size()):
+            conn = await stack.enter_async_context(async_engine.connect())
+            await conn.execute(text("SELECT 1"))
+    logger.info("✅ Notification Service connection pool warmed")
+
 async def close_db() -> None:
     """Close database connections"""
     engine.dispose()
+    await async_engine.dispose()
     logger.info("✅ Notification Service database connections closed")
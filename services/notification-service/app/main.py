@@ -2,10 +2,15 @@
 
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import logging
 
-from .database import init_db, close_db
+from .database import init_db, warm_pool, close_db
+from .auth_utils import init_http, close_http
+from .alert_stream import init_alert_stream, close_alert_stream
+from .broadcast_bus import init_broadcast_bus, close_broadcast_bus
 from .config import settings
+from .websocket_manager import websocket_manager
 from .routes import health, alerts, websocket
 from prometheus_fastapi_instrumentator import Instrumentator
 
@@ -17,6 +22,7 @@ app = FastAPI(
     title="Fleet Tracker Notification Service",
     description="Notification & Alert Management microservice",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     docs_url="/docs" if settings.ENVIRONMENT == "development" else None,
     contact={
         "name": "Trương Quốc Huân",
@@ -30,10 +36,11 @@ Instrumentator().instrument(app).expose(app)
 # CORS Configuration
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.cors_origins_list,
+    allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[alerts.NEXT_CURSOR_HEADER],
 )
 
 # Include routers
@@ -65,11 +72,20 @@ async def startup_event():
     """Initialize service resources"""
     logger.info("📢 Notification Service starting up...")
     await init_db()
+    await warm_pool()
+    await init_http()
+    await init_broadcast_bus()
+    await init_alert_stream()
+    websocket_manager.start()
     logger.info("✅ Notification Service ready")
 
 @app.on_event("shutdown") 
 async def shutdown_event():
     """Cleanup service resources"""
     logger.info("🔄 Notification Service shutting down...")
+    await close_alert_stream()
+    await close_broadcast_bus()
+    await websocket_manager.close()
+    await close_http()
     await close_db()
     logger.info("✅ Notification Service shutdown completed")
\ No newline at end of file
@@ -25,7 +25,7 @@ class Alert(Base):
     latitude = Column(DECIMAL(10, 8), nullable=True)
     longitude = Column(DECIMAL(11, 8), nullable=True)
     address = Column(Text, nullable=True)
-    alert_metadata = Column('metadata', JSONB, default={})
+    alert_metadata = Column('metadata', JSONB, default=dict)
     acknowledged_by = Column(UUID(as_uuid=True), nullable=True)
     acknowledged_at = Column(DateTime(timezone=True), nullable=True)
     resolved_by = Column(UUID(as_uuid=True), nullable=True)
@@ -36,7 +36,7 @@ class Alert(Base):
     escalation_level = Column(Integer, default=0)
     escalated_at = Column(DateTime(timezone=True), nullable=True)
     expires_at = Column(DateTime(timezone=True), nullable=True)
-    tags = Column(JSONB, default=[])
+    tags = Column(JSONB, default=list)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -66,7 +66,7 @@ class NotificationRule(Base):
     escalation_channels = Column(ARRAY(String), nullable=True)
     priority = Column(Integer, default=1)
     created_by = Column(UUID(as_uuid=True), nullable=False)
-    rule_metadata = Column('metadata', JSONB, default={})
+    rule_metadata = Column('metadata', JSONB, default=dict)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -77,7 +77,7 @@ class WebSocketConnection(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), nullable=False)
     connection_id = Column(String(255), nullable=False)
-    client_info = Column(JSONB, default={})
+    client_info = Column(JSONB, default=dict)
     ip_address = Column(String(45), nullable=True)  # Support IPv6
     connected_at = Column(DateTime(timezone=True), server_default=func.now())
     last_activity = Column(DateTime(timezone=True), server_default=func.now())
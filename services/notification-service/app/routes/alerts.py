@@ -1,16 +1,34 @@
 """Alert management routes"""
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, raiseload
+from typing import List, Optional, Tuple
+from pydantic import BaseModel, ConfigDict, field_validator
 import datetime
 import uuid
 
-from ..database import get_db
+from ..database import AsyncSessionLocal, get_db
 from ..models import Alert
 
 router = APIRouter()
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+# Only the columns AlertResponse needs are loaded; any other lazy load raises
+_alert_response_options = (
+    load_only(
+        Alert.id, Alert.vehicle_id, Alert.type, Alert.category, Alert.title, Alert.message,
+        Alert.severity, Alert.status, Alert.latitude, Alert.longitude, Alert.address,
+        Alert.created_at, Alert.acknowledged_at, Alert.resolved_at
+    ),
+    raiseload('*'),
+)
+
 class AlertResponse(BaseModel):
     id: str
     vehicle_id: str
@@ -26,9 +44,21 @@ class AlertResponse(BaseModel):
     created_at: datetime.datetime
     acknowledged_at: Optional[datetime.datetime]
     resolved_at: Optional[datetime.datetime]
+    
+    model_config = ConfigDict(from_attributes=True)
+    
+    @field_validator('id', 'vehicle_id', mode='before')
+    @classmethod
+    def _uuid_to_str(cls, v):
+        return str(v) if v is not None else v
+    
+    @field_validator('latitude', 'longitude', mode='before')
+    @classmethod
+    def _decimal_to_float(cls, v):
+        return float(v) if v is not None else None
 
 class AlertCreateRequest(BaseModel):
-    vehicle_id: str
+    vehicle_id: uuid.UUID
     type: str
     category: str
     title: str
@@ -38,52 +68,116 @@ class AlertCreateRequest(BaseModel):
     longitude: Optional[float] = None
     address: Optional[str] = None
 
+def _filtered_alerts(vehicle_id: Optional[str], status: Optional[str], severity: Optional[str]):
+    """SELECT for alerts matching the optional list filters, loading only response columns"""
+    stmt = select(Alert).options(*_alert_response_options)
+    
+    if vehicle_id:
+        stmt = stmt.where(Alert.vehicle_id == vehicle_id)
+    if status:
+        stmt = stmt.where(Alert.status == status)
+    if severity:
+        stmt = stmt.where(Alert.severity == severity)
+    return stmt
+
+def _encode_cursor(alert: Alert) -> str:
+    """Keyset cursor for the rows after alert: "<created_at as epoch microseconds>_<id hex>"
+    
+    created_at alone can tie, so the id is part of the key. Digits, "_" and hex
+    need no URL encoding, unlike the "+00:00" of an ISO timestamp.
+    """
+    created_at = alert.created_at
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=datetime.timezone.utc)
+    return f"{(created_at - _EPOCH) // _MICROSECOND}_{alert.id.hex}"
+
+def _decode_cursor(cursor: str) -> Tuple[datetime.datetime, uuid.UUID]:
+    """Parse a cursor made by _encode_cursor or raise 400"""
+    micros, _, alert_id = cursor.partition("_")
+    try:
+        return _EPOCH + int(micros) * _MICROSECOND, uuid.UUID(hex=alert_id)
+    except (ValueError, OverflowError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _after_cursor(stmt, cursor: str):
+    """Seek past the cursor on the (created_at, id) index, newest first
+    
+    id breaks created_at ties, so alerts sharing a timestamp are neither skipped nor repeated.
+    """
+    created_at, alert_id = _decode_cursor(cursor)
+    return stmt.where(tuple_(Alert.created_at, Alert.id) < tuple_(created_at, alert_id))
+
+async def _get_alert_or_404(db: AsyncSession, alert_id: uuid.UUID, options=()) -> Alert:
+    """Load an alert by primary key (identity map first) or raise 404"""
+    alert = await db.get(Alert, alert_id, options=options)
+    if not alert:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    return alert
+
 @router.get("/", response_model=List[AlertResponse])
 async def list_alerts(
+    response: Response,
     skip: int = Query(0, ge=0),
-    limit: int = Query(50, le=100),
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
     vehicle_id: Optional[str] = None,
     status: Optional[str] = None,
     severity: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """List alerts with filtering and pagination"""
-    query = db.query(Alert)
+    """List alerts, newest first, with filtering and pagination
     
-    if vehicle_id:
-        query = query.filter(Alert.vehicle_id == vehicle_id)
-    if status:
-        query = query.filter(Alert.status == status)
-    if severity:
-        query = query.filter(Alert.severity == severity)
-    
-    alerts = query.offset(skip).limit(limit).all()
-    
-    return [
-        AlertResponse(
-            id=str(alert.id),
-            vehicle_id=str(alert.vehicle_id),
-            type=alert.type,
-            category=alert.category,
-            title=alert.title,
-            message=alert.message,
-            severity=alert.severity,
-            status=alert.status,
-            latitude=float(alert.latitude) if alert.latitude else None,
-            longitude=float(alert.longitude) if alert.longitude else None,
-            address=alert.address,
-            created_at=alert.created_at,
-            acknowledged_at=alert.acknowledged_at,
-            resolved_at=alert.resolved_at
-        )
-        for alert in alerts
-    ]
+    Pass the X-Next-Cursor header of a page as cursor to fetch the next one without OFFSET.
+    """
+    stmt = _filtered_alerts(vehicle_id, status, severity)
+    
+    if cursor:
+        # Keyset pagination instead of OFFSET
+        stmt = _after_cursor(stmt, cursor)
+    else:
+        stmt = stmt.offset(skip)
+    
+    result = await db.execute(stmt.order_by(Alert.created_at.desc(), Alert.id.desc()).limit(limit))
+    alerts = result.scalars().all()
+    
+    if alerts and len(alerts) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = _encode_cursor(alerts[-1])
+    
+    return [AlertResponse.model_validate(alert) for alert in alerts]
+
+@router.get("/stream")
+async def stream_alerts(
+    limit: int = Query(1000, ge=1, le=10000),
+    cursor: Optional[str] = Query(None, description="Only alerts after this X-Next-Cursor value: <created_at epoch microseconds>_<id hex>"),
+    vehicle_id: Optional[str] = None,
+    status: Optional[str] = None,
+    severity: Optional[str] = None
+):
+    """Stream alerts, newest first, as NDJSON (one AlertResponse object per line)
+    
+    Rows are written as the server-side cursor yields them, so the first bytes go out
+    before the whole page has been fetched. The cursor format and (created_at, id)
+    ordering are the same as GET /alerts, so a stream can resume after its last alert.
+    """
+    stmt = _filtered_alerts(vehicle_id, status, severity)
+    if cursor:
+        stmt = _after_cursor(stmt, cursor)
+    stmt = stmt.order_by(Alert.created_at.desc(), Alert.id.desc()).limit(limit)
+    
+    async def lines():
+        # The session lives as long as the stream, not the request dependency
+        async with AsyncSessionLocal() as db:
+            result = await db.stream_scalars(stmt)
+            async for alert in result:
+                yield AlertResponse.model_validate(alert).model_dump_json().encode() + b"\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 @router.post("/", response_model=AlertResponse)
-async def create_alert(request: AlertCreateRequest, db: Session = Depends(get_db)):
+async def create_alert(request: AlertCreateRequest, db: AsyncSession = Depends(get_db)):
     """Create new alert"""
     alert = Alert(
-        vehicle_id=uuid.UUID(request.vehicle_id),
+        vehicle_id=request.vehicle_id,
         type=request.type,
         category=request.category,
         title=request.title,
@@ -91,83 +185,54 @@ async def create_alert(request: AlertCreateRequest, db: Session = Depends(get_db
         severity=request.severity,
         latitude=request.latitude,
         longitude=request.longitude,
-        address=request.address
+        address=request.address,
+        # Set explicitly so the response needs no reload after the INSERT
+        acknowledged_at=None,
+        resolved_at=None
     )
     
     db.add(alert)
-    db.commit()
-    db.refresh(alert)
-    
-    return AlertResponse(
-        id=str(alert.id),
-        vehicle_id=str(alert.vehicle_id),
-        type=alert.type,
-        category=alert.category,
-        title=alert.title,
-        message=alert.message,
-        severity=alert.severity,
-        status=alert.status,
-        latitude=float(alert.latitude) if alert.latitude else None,
-        longitude=float(alert.longitude) if alert.longitude else None,
-        address=alert.address,
-        created_at=alert.created_at,
-        acknowledged_at=alert.acknowledged_at,
-        resolved_at=alert.resolved_at
-    )
+    # created_at comes back through INSERT ... RETURNING
+    await db.commit()
+    
+    return AlertResponse.model_validate(alert)
 
 @router.get("/{alert_id}", response_model=AlertResponse)
-async def get_alert(alert_id: str, db: Session = Depends(get_db)):
+async def get_alert(alert_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
     """Get alert by ID"""
-    alert = db.query(Alert).filter(Alert.id == uuid.UUID(alert_id)).first()
-    
-    if not alert:
-        raise HTTPException(status_code=404, detail="Alert not found")
+    alert = await _get_alert_or_404(db, alert_id, options=_alert_response_options)
     
-    return AlertResponse(
-        id=str(alert.id),
-        vehicle_id=str(alert.vehicle_id),
-        type=alert.type,
-        category=alert.category,
-        title=alert.title,
-        message=alert.message,
-        severity=alert.severity,
-        status=alert.status,
-        latitude=float(alert.latitude) if alert.latitude else None,
-        longitude=float(alert.longitude) if alert.longitude else None,
-        address=alert.address,
-        created_at=alert.created_at,
-        acknowledged_at=alert.acknowledged_at,
-        resolved_at=alert.resolved_at
-    )
+    return AlertResponse.model_validate(alert)
 
 @router.post("/{alert_id}/acknowledge")
-async def acknowledge_alert(alert_id: str, db: Session = Depends(get_db)):
+async def acknowledge_alert(alert_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
     """Acknowledge alert"""
-    alert = db.query(Alert).filter(Alert.id == uuid.UUID(alert_id)).first()
-    
-    if not alert:
+    result = await db.execute(
+        update(Alert)
+        .where(Alert.id == alert_id)
+        .values(status="acknowledged", acknowledged_at=func.now())
+        .returning(Alert.id)
+    )
+    if result.first() is None:
         raise HTTPException(status_code=404, detail="Alert not found")
     
-    alert.acknowledged_at = datetime.datetime.utcnow()
-    alert.status = "acknowledged"
-    
-    db.commit()
+    await db.commit()
     
     return {"message": "Alert acknowledged successfully"}
 
 @router.post("/{alert_id}/resolve")
-async def resolve_alert(alert_id: str, resolution_notes: Optional[str] = None, db: Session = Depends(get_db)):
+async def resolve_alert(alert_id: uuid.UUID, resolution_notes: Optional[str] = None, db: AsyncSession = Depends(get_db)):
     """Resolve alert"""
-    alert = db.query(Alert).filter(Alert.id == uuid.UUID(alert_id)).first()
+    values = {"status": "resolved", "resolved_at": func.now()}
+    if resolution_notes:
+        values["resolution_notes"] = resolution_notes
     
-    if not alert:
+    result = await db.execute(
+        update(Alert).where(Alert.id == alert_id).values(**values).returning(Alert.id)
+    )
+    if result.first() is None:
         raise HTTPException(status_code=404, detail="Alert not found")
     
-    alert.resolved_at = datetime.datetime.utcnow()
-    alert.status = "resolved"
-    if resolution_notes:
-        alert.resolution_notes = resolution_notes
-    
-    db.commit()
+    await db.commit()
     
     return {"message": "Alert resolved successfully"}
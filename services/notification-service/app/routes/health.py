@@ -1,27 +1,43 @@
 """Health check endpoints for notification service"""
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from ..database import get_db
 import datetime
+import time
 
 router = APIRouter()
 
+# Probes in a burst share one SELECT 1; status is at most DB_STATUS_TTL seconds stale
+DB_STATUS_TTL = 2.0
+_db_status_cache = {"ts": float("-inf"), "status": "unknown", "timestamp": ""}
+
 @router.get("")
 @router.get("/")
-async def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_db)):
     """Health check endpoint"""
-    try:
-        # Test database connection
-        db.execute(text("SELECT 1"))
-        db_status = "healthy"
-    except Exception as e:
-        db_status = f"unhealthy: {str(e)}"
+    now = time.monotonic()
+    if now - _db_status_cache["ts"] >= DB_STATUS_TTL:
+        try:
+            # Test database connection
+            await db.execute(text("SELECT 1"))
+            db_status = "healthy"
+        except Exception as e:
+            db_status = f"unhealthy: {str(e)}"
+        # The reported timestamp is the time of the probe query
+        _db_status_cache.update(
+            ts=now, status=db_status, timestamp=datetime.datetime.utcnow().isoformat()
+        )
     
     return {
         "status": "healthy",
-        "timestamp": datetime.datetime.utcnow().isoformat(),
+        "timestamp": _db_status_cache["timestamp"],
         "service": "notification-service",
-        "database": db_status,
+        "database": _db_status_cache["status"],
         "version": "1.0.0"
     }
+
+@router.get("/live")
+async def liveness_check():
+    """Liveness probe: process is up, no database round-trip"""
+    return {"status": "alive", "service": "notification-service"}
@@ -1,20 +1,27 @@
 """WebSocket routes for real-time notifications"""
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, HTTPException
 from typing import Optional
-import json
 import logging
 
-from ..websocket_manager import websocket_manager
+import orjson
+
+from ..websocket_manager import websocket_manager, dumps_text
 from ..auth_utils import verify_websocket_token
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Error replies never change, so they are serialized once
+_ERR_INVALID_JSON = dumps_text({"type": "error", "message": "Invalid JSON format"})
+_ERR_INTERNAL = dumps_text({"type": "error", "message": "Internal server error"})
+
 @router.websocket("/ws")
 async def websocket_endpoint(
     websocket: WebSocket,
     token: Optional[str] = Query(None),
-    client_info: Optional[str] = Query(None)
+    client_info: Optional[str] = Query(None),
+    format: Optional[str] = Query(None, description="msgpack for MessagePack or zlib for compressed JSON, both as binary frames"),
+    batch: bool = Query(False, description="Coalesce location updates into periodic batch frames")
 ):
     """WebSocket endpoint for real-time notifications"""
     
@@ -30,9 +37,13 @@ async def websocket_endpoint(
     client_info_dict = {}
     if client_info:
         try:
-            client_info_dict = json.loads(client_info)
-        except json.JSONDecodeError:
-            logger.warning(f"Invalid client_info format: {client_info}")
+            client_info_dict = orjson.loads(client_info)
+        except orjson.JSONDecodeError:
+            logger.warning("Invalid client_info format: %s", client_info)
+    if format:
+        client_info_dict["format"] = format
+    if batch:
+        client_info_dict["batch"] = True
     
     connection_id = None
     
@@ -49,29 +60,23 @@ async def websocket_endpoint(
             try:
                 # Receive message from client
                 data = await websocket.receive_text()
-                message = json.loads(data)
+                message = orjson.loads(data)
                 
                 # Handle message
                 await websocket_manager.handle_message(connection_id, message)
                 
             except WebSocketDisconnect:
-                logger.info(f"WebSocket client disconnected: {user_id}")
+                logger.info("WebSocket client disconnected: %s", user_id)
                 break
-            except json.JSONDecodeError:
-                logger.error(f"Invalid JSON received from {user_id}")
-                await websocket.send_text(json.dumps({
-                    "type": "error",
-                    "message": "Invalid JSON format"
-                }))
+            except orjson.JSONDecodeError:
+                logger.error("Invalid JSON received from %s", user_id)
+                await websocket.send_text(_ERR_INVALID_JSON)
             except Exception as e:
-                logger.error(f"Error handling WebSocket message: {str(e)}")
-                await websocket.send_text(json.dumps({
-                    "type": "error", 
-                    "message": "Internal server error"
-                }))
+                logger.error("Error handling WebSocket message: %s", e)
+                await websocket.send_text(_ERR_INTERNAL)
                 
     except Exception as e:
-        logger.error(f"WebSocket connection error: {str(e)}")
+        logger.error("WebSocket connection error: %s", e)
     finally:
         # Clean up connection
         if connection_id:
@@ -1,3 +0,0 @@
-from app.websocket.manager import WebSocketManager, websocket_manager
-
-__all__ = ["WebSocketManager", "websocket_manager"]
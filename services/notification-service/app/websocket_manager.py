@@ -1,35 +1,120 @@
 """WebSocket Manager for Real-time Notifications"""
 import asyncio
-import json
 import logging
-from typing import Dict, List, Optional, Set, Any
-from datetime import datetime, timedelta
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set, Any
+from datetime import datetime, timedelta, timezone
 import uuid
+import zlib
 
+import msgpack
+import orjson
 from fastapi import WebSocket, WebSocketDisconnect
-from sqlalchemy.orm import Session
-from pydantic import BaseModel, ValidationError
+from starlette.websockets import WebSocketState
+from sqlalchemy import bindparam, delete, insert, select
+from pydantic import BaseModel, Field, ValidationError
 
-from .database import SessionLocal
+from .database import AsyncSessionLocal
 from .models import WebSocketConnection, Alert
 from .config import settings
 
 logger = logging.getLogger(__name__)
 
+# Frames buffered per connection before a client is considered too slow and dropped
+SEND_QUEUE_SIZE = 256
+# Large broadcasts yield to the event loop after queuing this many frames
+BROADCAST_BATCH_SIZE = 64
+# Seconds between refreshes of the cached server time sent in ping and welcome replies
+SERVER_TIME_RESOLUTION = 0.1
+# Connection-record writes are flushed in one transaction per batch or per interval
+DB_FLUSH_BATCH_SIZE = 50
+DB_FLUSH_INTERVAL = 0.1
+# get_alerts replies within this many seconds share one query
+RECENT_ALERTS_TTL = 1.0
+# Seconds a single frame may take to reach a client's socket before it is disconnected
+SEND_TIMEOUT = 5.0
+# Location updates for clients that opted into batching are coalesced for this many seconds,
+# or until this many are pending, and then sent as one "batch" frame
+UPDATE_BATCH_WINDOW = 0.05
+UPDATE_BATCH_MAX = 200
+
+def dumps_text(obj: Any) -> str:
+    """Serialize obj to a JSON string with orjson; naive datetimes are marked as UTC"""
+    return orjson.dumps(obj, option=orjson.OPT_NAIVE_UTC).decode()
+
+def _msgpack_default(obj: Any):
+    """Encode types msgpack lacks the same way orjson does for JSON clients"""
+    if isinstance(obj, datetime):
+        return (obj if obj.tzinfo else obj.replace(tzinfo=timezone.utc)).isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+def dumps_msgpack(obj: Any) -> bytes:
+    """Serialize obj to MessagePack for clients that negotiated format=msgpack"""
+    return msgpack.packb(obj, default=_msgpack_default, use_bin_type=True)
+
+# json: text frames; msgpack: binary MessagePack; zlib: binary zlib-compressed JSON
+WIRE_FORMATS = ("json", "msgpack", "zlib")
+# Fast compression: frames are compressed once per broadcast but on the event loop
+ZLIB_LEVEL = 1
+
+def _encode_frames(formats: Set[str], json_bytes: bytes, envelope: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """Encode one message once for each wire format in use"""
+    frames: Dict[str, Any] = {}
+    if "json" in formats:
+        frames["json"] = json_bytes.decode()
+    if "msgpack" in formats:
+        frames["msgpack"] = dumps_msgpack(envelope())
+    if "zlib" in formats:
+        frames["zlib"] = zlib.compress(json_bytes, ZLIB_LEVEL)
+    return frames
+
+# Constant JSON heads of the hot broadcast frames; the serialized data is spliced in after them
+_ALERT_PREFIX = b'{"type":"alert","data":'
+_LOCATION_UPDATE_PREFIX = b'{"type":"location_update","data":'
+_BATCH_PREFIX = b'{"type":"batch","items":['
+
+_NO_SUBSCRIBERS: frozenset = frozenset()
+
+# Only the columns get_alerts returns, so no ORM objects are hydrated
+_SQL_RECENT_ALERTS = (
+    select(Alert.id, Alert.vehicle_id, Alert.type, Alert.message, Alert.severity, Alert.created_at)
+    .where(Alert.created_at >= bindparam("since"))
+    .order_by(Alert.created_at.desc())
+    .limit(50)
+)
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def _new_message_id() -> str:
+    # Same 32 hex digits as uuid4().hex without building a UUID object
+    return os.urandom(16).hex()
+
 class WebSocketMessage(BaseModel):
-    """WebSocket message format"""
-    type: str  # subscribe, unsubscribe, ping, alert, location_update
+    """Inbound WebSocket message, validated once in handle_message"""
+    type: str  # subscribe, unsubscribe, ping, get_alerts
     data: Dict[str, Any] = {}
-    timestamp: datetime = datetime.utcnow()
-    message_id: str = ""
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    message_id: str = Field(default_factory=_new_message_id)
+
+class OutboundMessage:
+    """Server-built WebSocket message; its shape is fixed, so it skips validation"""
+    # Declared by hand: dataclass(slots=True) needs Python 3.10 and CI runs 3.9
+    __slots__ = ("type", "data", "timestamp", "message_id")
     
-    def __init__(self, **data):
-        if not data.get('message_id'):
-            data['message_id'] = str(uuid.uuid4())
-        super().__init__(**data)
+    def __init__(self, type: str, data: Dict[str, Any], timestamp: Optional[str] = None,
+                 message_id: Optional[str] = None):
+        self.type = type
+        self.data = data
+        self.timestamp = timestamp if timestamp is not None else _utc_now_iso()
+        self.message_id = message_id if message_id is not None else _new_message_id()
     
-    class Config:
-        arbitrary_types_allowed = True
+    def as_dict(self) -> Dict[str, Any]:
+        return {"type": self.type, "data": self.data, "timestamp": self.timestamp, "message_id": self.message_id}
 
 class ConnectionInfo:
     """WebSocket connection information"""
@@ -38,8 +123,19 @@ class ConnectionInfo:
         self.connection_id = connection_id
         self.websocket = websocket
         self.subscriptions: Set[str] = set()
-        self.last_activity = datetime.utcnow()
+        # Monotonic seconds of the last inbound frame, for idle detection
+        self.last_activity = time.monotonic()
         self.client_info = client_info or {}
+        # Wire format negotiated through client_info: JSON text frames or MessagePack binary frames
+        wire_format = self.client_info.get("format")
+        self.wire_format = wire_format if wire_format in WIRE_FORMATS else "json"
+        # Outgoing frames, drained by a per-connection writer task
+        self.send_queue: asyncio.Queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self.writer_task: Optional[asyncio.Task] = None
+        # Opt-in coalescing of location updates: JSON bytes (or dicts for msgpack) awaiting one batch frame
+        self.batch_updates = self.client_info.get("batch") is True
+        self.pending_updates: List[Any] = []
+        self.flush_task: Optional[asyncio.Task] = None
 
 class WebSocketManager:
     """Manages WebSocket connections for real-time notifications"""
@@ -54,10 +150,28 @@ class WebSocketManager:
         # Subscription groups: {subscription_type: Set[connection_id]}
         self.subscriptions: Dict[str, Set[str]] = {}
         
-        # Message queue for offline users
-        self.message_queue: Dict[str, List[WebSocketMessage]] = {}
+        # Latest messages for offline users; older ones fall off the bounded deque
+        self.message_queue: Dict[str, Deque[OutboundMessage]] = {}
+        
+        self.cleanup_task: Optional[asyncio.Task] = None
+        
+        # Background closes of dropped sockets, referenced here until they finish
+        self._close_tasks: Set[asyncio.Task] = set()
         
-        self.cleanup_task = None
+        # Cached server time, refreshed by clock_task while any client is connected
+        self.server_time_iso = datetime.utcnow().isoformat()
+        self.clock_task: Optional[asyncio.Task] = None
+        
+        # (loaded_at, alerts) for get_alerts; alerts aren't per-user, so replies share it
+        self._recent_alerts: tuple = (float("-inf"), [])
+        self._recent_alerts_lock = asyncio.Lock()
+        
+        # Pending ("insert", row) / ("delete", connection_id) writes, drained by db_flush_task
+        self._db_writes: asyncio.Queue = asyncio.Queue()
+        self.db_flush_task: Optional[asyncio.Task] = None
+        
+        # Set by broadcast_bus when Redis fan-out is running: (kind, data) -> publish to all workers
+        self.bus_publish: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None
     
     async def connect(self, websocket: WebSocket, user_id: str, client_info: Dict = None) -> str:
         """Accept new WebSocket connection"""
@@ -74,22 +188,24 @@ class WebSocketManager:
         
         # Store connection
         self.connections[connection_id] = connection_info
+        connection_info.writer_task = asyncio.create_task(self._writer_loop(connection_info))
+        if self.clock_task is None:
+            self.server_time_iso = datetime.utcnow().isoformat()
+            self.clock_task = asyncio.create_task(self._tick_server_time())
         
         # Track user connections
-        if user_id not in self.user_connections:
-            self.user_connections[user_id] = set()
-        self.user_connections[user_id].add(connection_id)
+        self.user_connections.setdefault(user_id, set()).add(connection_id)
         
         # Store in database
         await self._store_connection_db(connection_info)
         
         # Send welcome message
-        welcome_msg = WebSocketMessage(
+        welcome_msg = OutboundMessage(
             type="connection_established",
             data={
                 "connection_id": connection_id,
                 "user_id": user_id,
-                "server_time": datetime.utcnow().isoformat()
+                "server_time": self.server_time_iso
             }
         )
         await self._send_to_connection(connection_id, welcome_msg)
@@ -97,7 +213,7 @@ class WebSocketManager:
         # Send queued messages
         await self._send_queued_messages(user_id, connection_id)
         
-        logger.info(f"🔗 WebSocket connected: {user_id} ({connection_id})")
+        logger.info("🔗 WebSocket connected: %s (%s)", user_id, connection_id)
         return connection_id
     
     async def disconnect(self, connection_id: str):
@@ -108,9 +224,14 @@ class WebSocketManager:
         connection_info = self.connections[connection_id]
         user_id = connection_info.user_id
         
-        # Remove from subscriptions
-        for subscription_type in list(connection_info.subscriptions):
-            await self._unsubscribe_connection(connection_id, subscription_type)
+        # Remove from subscriptions using the connection's own reverse index
+        for subscription_type in connection_info.subscriptions:
+            subscribers = self.subscriptions.get(subscription_type)
+            if subscribers is not None:
+                subscribers.discard(connection_id)
+                if not subscribers:
+                    del self.subscriptions[subscription_type]
+        connection_info.subscriptions.clear()
         
         # Remove from user connections
         if user_id in self.user_connections:
@@ -120,11 +241,18 @@ class WebSocketManager:
         
         # Remove connection
         del self.connections[connection_id]
+        current = asyncio.current_task()
+        for task in (connection_info.writer_task, connection_info.flush_task):
+            if task and task is not current:
+                task.cancel()
+        if not self.connections and self.clock_task:
+            self.clock_task.cancel()
+            self.clock_task = None
         
         # Update database
         await self._remove_connection_db(connection_id)
         
-        logger.info(f"❌ WebSocket disconnected: {user_id} ({connection_id})")
+        logger.info("❌ WebSocket disconnected: %s (%s)", user_id, connection_id)
     
     async def handle_message(self, connection_id: str, message: dict):
         """Handle incoming WebSocket message"""
@@ -134,9 +262,9 @@ class WebSocketManager:
         try:
             ws_message = WebSocketMessage(**message)
             connection_info = self.connections[connection_id]
-            connection_info.last_activity = datetime.utcnow()
+            connection_info.last_activity = time.monotonic()
             
-            logger.debug(f"📨 Received message from {connection_info.user_id}: {ws_message.type}")
+            logger.debug("📨 Received message from %s: %s", connection_info.user_id, ws_message.type)
             
             # Handle different message types
             if ws_message.type == "subscribe":
@@ -148,71 +276,67 @@ class WebSocketManager:
             elif ws_message.type == "get_alerts":
                 await self._handle_get_alerts(connection_id, ws_message)
             else:
-                logger.warning(f"Unknown message type: {ws_message.type}")
+                logger.warning("Unknown message type: %s", ws_message.type)
         
         except ValidationError as e:
-            logger.error(f"Invalid WebSocket message format: {str(e)}")
+            logger.error("Invalid WebSocket message format: %s", e)
             await self._send_error(connection_id, "Invalid message format")
         except Exception as e:
-            logger.error(f"Error handling WebSocket message: {str(e)}")
+            logger.error("Error handling WebSocket message: %s", e)
             await self._send_error(connection_id, "Internal server error")
     
     async def broadcast_alert(self, alert_data: Dict[str, Any]):
-        """Broadcast alert to subscribed users"""
-        alert_message = WebSocketMessage(
-            type="alert",
-            data=alert_data
-        )
-        
+        """Broadcast alert to subscribed users on every worker"""
+        if self.bus_publish:
+            await self.bus_publish("alert", alert_data)
+        else:
+            await self.deliver_alert(alert_data)
+    
+    async def deliver_alert(self, alert_data: Dict[str, Any]):
+        """Send alert to subscribed connections on this worker"""
         # Send to all users subscribed to alerts
-        subscription_key = "alerts"
-        if subscription_key in self.subscriptions:
-            for connection_id in list(self.subscriptions[subscription_key]):
-                await self._send_to_connection(connection_id, alert_message)
+        recipients = self.subscriptions.get("alerts", _NO_SUBSCRIBERS)
         
-        # Send to users subscribed to specific vehicle
+        # Plus users subscribed to the specific vehicle, as one C-level set union
         vehicle_id = alert_data.get('vehicle_id')
         if vehicle_id:
-            vehicle_subscription = f"vehicle_{vehicle_id}"
-            if vehicle_subscription in self.subscriptions:
-                for connection_id in list(self.subscriptions[vehicle_subscription]):
-                    await self._send_to_connection(connection_id, alert_message)
+            recipients = recipients | self.subscriptions.get(f"vehicle_{vehicle_id}", _NO_SUBSCRIBERS)
+        
+        await self._broadcast_event(recipients, "alert", _ALERT_PREFIX, alert_data)
     
     async def broadcast_location_update(self, location_data: Dict[str, Any]):
-        """Broadcast location update to subscribed users"""
-        location_message = WebSocketMessage(
-            type="location_update",
-            data=location_data
-        )
-        
+        """Broadcast location update to subscribed users on every worker"""
+        if self.bus_publish:
+            await self.bus_publish("location_update", location_data)
+        else:
+            await self.deliver_location_update(location_data)
+    
+    async def deliver_location_update(self, location_data: Dict[str, Any]):
+        """Send location update to subscribed connections on this worker"""
         vehicle_id = location_data.get('vehicle_id')
         if not vehicle_id:
             return
         
-        # Send to users subscribed to this vehicle
-        subscription_key = f"vehicle_{vehicle_id}"
-        if subscription_key in self.subscriptions:
-            for connection_id in list(self.subscriptions[subscription_key]):
-                await self._send_to_connection(connection_id, location_message)
+        # Send to users subscribed to this vehicle and to all vehicles
+        recipients = (
+            self.subscriptions.get(f"vehicle_{vehicle_id}", _NO_SUBSCRIBERS)
+            | self.subscriptions.get("all_vehicles", _NO_SUBSCRIBERS)
+        )
         
-        # Send to users subscribed to all vehicles
-        all_vehicles_key = "all_vehicles"
-        if all_vehicles_key in self.subscriptions:
-            for connection_id in list(self.subscriptions[all_vehicles_key]):
-                await self._send_to_connection(connection_id, location_message)
+        await self._broadcast_event(recipients, "location_update", _LOCATION_UPDATE_PREFIX, location_data)
     
-    async def send_to_user(self, user_id: str, message: WebSocketMessage):
+    async def send_to_user(self, user_id: str, message: OutboundMessage):
         """Send message to specific user (all their connections)"""
-        if user_id not in self.user_connections:
+        connection_ids = self.user_connections.get(user_id)
+        if not connection_ids:
             # Queue message for offline user
-            if user_id not in self.message_queue:
-                self.message_queue[user_id] = []
-            self.message_queue[user_id].append(message)
+            self.message_queue.setdefault(
+                user_id, deque(maxlen=settings.WS_OFFLINE_QUEUE_SIZE)
+            ).append(message)
             return
         
         # Send to all user's connections
-        for connection_id in list(self.user_connections[user_id]):
-            await self._send_to_connection(connection_id, message)
+        await self._broadcast(connection_ids, message)
     
     async def _handle_subscribe(self, connection_id: str, message: WebSocketMessage):
         """Handle subscription request"""
@@ -223,9 +347,7 @@ class WebSocketManager:
             return
         
         # Add to subscription group
-        if subscription_type not in self.subscriptions:
-            self.subscriptions[subscription_type] = set()
-        self.subscriptions[subscription_type].add(connection_id)
+        self.subscriptions.setdefault(subscription_type, set()).add(connection_id)
         
         # Add to connection subscriptions
         connection_info = self.connections[connection_id]
@@ -235,7 +357,7 @@ class WebSocketManager:
         await self._update_connection_subscriptions_db(connection_id, list(connection_info.subscriptions))
         
         # Send confirmation
-        response = WebSocketMessage(
+        response = OutboundMessage(
             type="subscription_confirmed",
             data={
                 "subscription_type": subscription_type,
@@ -244,7 +366,7 @@ class WebSocketManager:
         )
         await self._send_to_connection(connection_id, response)
         
-        logger.info(f"📋 User subscribed to {subscription_type} ({connection_id})")
+        logger.info("📋 User subscribed to %s (%s)", subscription_type, connection_id)
     
     async def _handle_unsubscribe(self, connection_id: str, message: WebSocketMessage):
         """Handle unsubscription request"""
@@ -253,7 +375,7 @@ class WebSocketManager:
         if subscription_type:
             await self._unsubscribe_connection(connection_id, subscription_type)
         
-        response = WebSocketMessage(
+        response = OutboundMessage(
             type="unsubscription_confirmed",
             data={
                 "subscription_type": subscription_type,
@@ -264,10 +386,10 @@ class WebSocketManager:
     
     async def _handle_ping(self, connection_id: str, message: WebSocketMessage):
         """Handle ping message"""
-        pong = WebSocketMessage(
+        pong = OutboundMessage(
             type="pong",
             data={
-                "server_time": datetime.utcnow().isoformat(),
+                "server_time": self.server_time_iso,
                 "original_message_id": message.message_id
             }
         )
@@ -275,56 +397,211 @@ class WebSocketManager:
     
     async def _handle_get_alerts(self, connection_id: str, message: WebSocketMessage):
         """Handle get alerts request"""
-        connection_info = self.connections[connection_id]
-        user_id = connection_info.user_id
-        
-        # Get recent alerts from database
-        db = SessionLocal()
         try:
-            alerts = db.query(Alert).filter(
-                Alert.created_at >= datetime.utcnow() - timedelta(hours=24)
-            ).order_by(Alert.created_at.desc()).limit(50).all()
+            alerts_data = await self._get_recent_alerts()
             
-            alerts_data = [
-                {
-                    "id": str(alert.id),
-                    "vehicle_id": str(alert.vehicle_id),
-                    "type": alert.type,
-                    "message": alert.message,
-                    "severity": alert.severity,
-                    "created_at": alert.created_at.isoformat()
-                }
-                for alert in alerts
-            ]
-            
-            response = WebSocketMessage(
+            response = OutboundMessage(
                 type="alerts_list",
                 data={"alerts": alerts_data}
             )
             await self._send_to_connection(connection_id, response)
             
         except Exception as e:
-            logger.error(f"Error getting alerts: {str(e)}")
+            logger.error("Error getting alerts: %s", e)
             await self._send_error(connection_id, "Failed to get alerts")
-        finally:
-            db.close()
     
-    async def _send_to_connection(self, connection_id: str, message: WebSocketMessage):
+    async def _get_recent_alerts(self) -> List[Dict[str, Any]]:
+        """Alerts from the last 24h, queried at most once per RECENT_ALERTS_TTL"""
+        if time.monotonic() - self._recent_alerts[0] < RECENT_ALERTS_TTL:
+            return self._recent_alerts[1]
+        
+        # Requests that miss together wait on one query instead of each checking out a connection
+        async with self._recent_alerts_lock:
+            loaded_at, alerts_data = self._recent_alerts
+            if time.monotonic() - loaded_at < RECENT_ALERTS_TTL:
+                return alerts_data
+            
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    _SQL_RECENT_ALERTS, {"since": datetime.utcnow() - timedelta(hours=24)}
+                )
+                alerts_data = [
+                    {
+                        "id": str(alert_id),
+                        "vehicle_id": str(vehicle_id),
+                        "type": alert_type,
+                        "message": alert_message,
+                        "severity": severity,
+                        "created_at": created_at.isoformat()
+                    }
+                    for alert_id, vehicle_id, alert_type, alert_message, severity, created_at in result
+                ]
+            self._recent_alerts = (time.monotonic(), alerts_data)
+            return alerts_data
+    
+    async def _send_to_connection(self, connection_id: str, message: OutboundMessage):
         """Send message to specific connection"""
         if connection_id not in self.connections:
             return
         
         connection_info = self.connections[connection_id]
+        data = message.as_dict()
+        wire_format = connection_info.wire_format
+        if wire_format == "msgpack":
+            frame = dumps_msgpack(data)
+        else:
+            json_bytes = orjson.dumps(data, option=orjson.OPT_NAIVE_UTC)
+            frame = _encode_frames({wire_format}, json_bytes, lambda: data)[wire_format]
+        await self._enqueue(connection_info, frame)
+    
+    async def _broadcast(self, connection_ids: Iterable[str], message: OutboundMessage):
+        """Queue one message for many connections, serializing it once per wire format"""
+        targets = [self.connections[cid] for cid in connection_ids if cid in self.connections]
+        if not targets:
+            return
+        
+        data = message.as_dict()
+        frames = _encode_frames(
+            {t.wire_format for t in targets}, orjson.dumps(data, option=orjson.OPT_NAIVE_UTC), lambda: data
+        )
+        
+        await self._fan_out(targets, frames)
+    
+    async def _broadcast_event(self, connection_ids: Iterable[str], msg_type: str, prefix: bytes, data: Dict[str, Any]):
+        """Queue an alert or location update without building an OutboundMessage
+        
+        The JSON frame is the constant prefix, the serialized data and a short suffix
+        joined as bytes, so the data is encoded once and never copied into an envelope.
+        """
+        targets = [self.connections[cid] for cid in connection_ids if cid in self.connections]
+        if not targets:
+            return
+        
+        timestamp = _utc_now_iso()
+        message_id = _new_message_id()
+        suffix = f',"timestamp":"{timestamp}","message_id":"{message_id}"}}'.encode()
+        json_bytes = prefix + orjson.dumps(data, option=orjson.OPT_NAIVE_UTC) + suffix
+        
+        def envelope():
+            return {"type": msg_type, "data": data, "timestamp": timestamp, "message_id": message_id}
+        
+        if msg_type == "location_update":
+            batched = [t for t in targets if t.batch_updates]
+            if batched:
+                targets = [t for t in targets if not t.batch_updates]
+                message = envelope()
+                for target in batched:
+                    await self._buffer_update(target, message if target.wire_format == "msgpack" else json_bytes)
+                if not targets:
+                    return
+        
+        frames = _encode_frames({t.wire_format for t in targets}, json_bytes, envelope)
+        
+        await self._fan_out(targets, frames)
+    
+    async def _buffer_update(self, connection_info: ConnectionInfo, item: Any):
+        """Add a location update to the connection's pending batch, flushing when it is full"""
+        connection_info.pending_updates.append(item)
+        if len(connection_info.pending_updates) >= UPDATE_BATCH_MAX:
+            if connection_info.flush_task:
+                connection_info.flush_task.cancel()
+                connection_info.flush_task = None
+            await self._flush_updates(connection_info)
+        elif connection_info.flush_task is None:
+            connection_info.flush_task = asyncio.create_task(self._flush_updates_later(connection_info))
+    
+    async def _flush_updates_later(self, connection_info: ConnectionInfo):
+        """Flush the pending batch once UPDATE_BATCH_WINDOW has passed"""
+        await asyncio.sleep(UPDATE_BATCH_WINDOW)
+        connection_info.flush_task = None
+        if connection_info.connection_id in self.connections:
+            await self._flush_updates(connection_info)
+    
+    async def _flush_updates(self, connection_info: ConnectionInfo):
+        """Queue the pending location updates as one {"type": "batch", "items": [...]} frame"""
+        items, connection_info.pending_updates = connection_info.pending_updates, []
+        if not items:
+            return
+        
+        wire_format = connection_info.wire_format
+        if wire_format == "msgpack":
+            frame = dumps_msgpack({"type": "batch", "items": items})
+        else:
+            # Items are already-serialized messages, so the batch is spliced together as bytes
+            json_bytes = _BATCH_PREFIX + b",".join(items) + b"]}"
+            frame = json_bytes.decode() if wire_format == "json" else zlib.compress(json_bytes, ZLIB_LEVEL)
+        await self._enqueue(connection_info, frame)
+    
+    async def _fan_out(self, targets: List[ConnectionInfo], frames: Dict[str, Any]):
+        """Queue pre-serialized frames for each target in its wire format"""
+        for start in range(0, len(targets), BROADCAST_BATCH_SIZE):
+            if start:
+                # Keep other requests and the writers moving during large fan-outs
+                await asyncio.sleep(0)
+            for target in targets[start:start + BROADCAST_BATCH_SIZE]:
+                await self._enqueue(target, frames[target.wire_format])
+        
+        # Let the writers run so back-to-back broadcasts don't fill every queue
+        await asyncio.sleep(0)
+    
+    async def _enqueue(self, connection_info: ConnectionInfo, frame):
+        """Hand a frame to the connection's writer without waiting on the socket"""
+        try:
+            connection_info.send_queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            logger.warning("Send queue full, dropping slow connection %s", connection_info.connection_id)
+            await self.disconnect(connection_info.connection_id)
+            # The client's socket is backed up, so the close frame may block too: never wait on it here
+            self._close_in_background(connection_info, 1013)
+    
+    def _close_in_background(self, connection_info: ConnectionInfo, code: int):
+        """Close a dropped connection's socket in its own task so the caller never waits on it"""
+        task = asyncio.create_task(self._close_socket(connection_info, code))
+        self._close_tasks.add(task)
+        task.add_done_callback(self._close_tasks.discard)
+    
+    async def _close_socket(self, connection_info: ConnectionInfo, code: int):
+        """Close a connection's socket once its writer has stopped, ignoring errors from a broken one"""
+        writer = connection_info.writer_task
+        if writer and not writer.done():
+            # disconnect() cancelled it; don't close under a send that is still unwinding
+            await asyncio.wait((writer,))
         try:
-            await connection_info.websocket.send_text(message.json())
+            await asyncio.wait_for(connection_info.websocket.close(code=code), SEND_TIMEOUT)
+        except Exception:
+            pass
+    
+    async def _writer_loop(self, connection_info: ConnectionInfo):
+        """Drain a connection's send queue into its socket; bytes go out as binary frames"""
+        websocket = connection_info.websocket
+        try:
+            while True:
+                frame = await connection_info.send_queue.get()
+                if isinstance(frame, bytes):
+                    await asyncio.wait_for(websocket.send_bytes(frame), SEND_TIMEOUT)
+                else:
+                    await asyncio.wait_for(websocket.send_text(frame), SEND_TIMEOUT)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            logger.warning("Send timed out, dropping stalled connection %s", connection_info.connection_id)
+            close_code = 1013
         except Exception as e:
-            logger.error(f"Error sending to connection {connection_id}: {str(e)}")
-            # Remove broken connection
-            await self.disconnect(connection_id)
+            logger.error("Error sending to connection %s: %s", connection_info.connection_id, e)
+            close_code = 1011
+        # Remove broken connection; the close runs after this writer has returned
+        await self.disconnect(connection_info.connection_id)
+        self._close_in_background(connection_info, close_code)
+    
+    async def _tick_server_time(self):
+        """Refresh the cached server time so pings don't each format the clock"""
+        while True:
+            await asyncio.sleep(SERVER_TIME_RESOLUTION)
+            self.server_time_iso = datetime.utcnow().isoformat()
     
     async def _send_error(self, connection_id: str, error_message: str):
         """Send error message to connection"""
-        error_msg = WebSocketMessage(
+        error_msg = OutboundMessage(
             type="error",
             data={"message": error_message}
         )
@@ -332,9 +609,10 @@ class WebSocketManager:
     
     async def _unsubscribe_connection(self, connection_id: str, subscription_type: str):
         """Remove connection from subscription"""
-        if subscription_type in self.subscriptions:
-            self.subscriptions[subscription_type].discard(connection_id)
-            if not self.subscriptions[subscription_type]:
+        subscribers = self.subscriptions.get(subscription_type)
+        if subscribers is not None:
+            subscribers.discard(connection_id)
+            if not subscribers:
                 del self.subscriptions[subscription_type]
         
         if connection_id in self.connections:
@@ -342,44 +620,121 @@ class WebSocketManager:
     
     async def _send_queued_messages(self, user_id: str, connection_id: str):
         """Send queued messages to newly connected user"""
-        if user_id not in self.message_queue:
+        messages = self.message_queue.pop(user_id, None)
+        if not messages:
             return
         
-        messages = self.message_queue[user_id]
-        for message in messages[-10:]:  # Send last 10 messages
-            await self._send_to_connection(connection_id, message)
-        
-        # Clear queue
-        del self.message_queue[user_id]
+        while messages:
+            if connection_id not in self.connections:
+                # Dropped mid-replay: keep the rest for the user's next connection
+                self.message_queue[user_id] = messages
+                return
+            await self._send_to_connection(connection_id, messages.popleft())
     
     async def _store_connection_db(self, connection_info: ConnectionInfo):
-        """Store connection in database"""
-        db = SessionLocal()
+        """Queue the connection record for the next batched insert"""
         try:
-            db_connection = WebSocketConnection(
-                user_id=uuid.UUID(connection_info.user_id),
-                connection_id=connection_info.connection_id,
-                client_info=connection_info.client_info
-            )
-            db.add(db_connection)
-            db.commit()
-        except Exception as e:
-            logger.error(f"Error storing connection in DB: {str(e)}")
-        finally:
-            db.close()
+            user_id = uuid.UUID(connection_info.user_id)
+        except ValueError as e:
+            logger.error("Error storing connection in DB: %s", e)
+            return
+        self._queue_db_write("insert", {
+            "user_id": user_id,
+            "connection_id": connection_info.connection_id,
+            "client_info": connection_info.client_info
+        })
     
     async def _remove_connection_db(self, connection_id: str):
-        """Remove connection from database"""
-        db = SessionLocal()
+        """Queue the connection record for the next batched delete"""
+        self._queue_db_write("delete", connection_id)
+    
+    def _queue_db_write(self, kind: str, value: Any):
+        """Hand a connection-record write to the flusher, starting it on first use"""
+        self._db_writes.put_nowait((kind, value))
+        if self.db_flush_task is None:
+            self.db_flush_task = asyncio.create_task(self._db_flush_loop())
+    
+    async def _db_flush_loop(self):
+        """Collect writes for up to DB_FLUSH_INTERVAL or DB_FLUSH_BATCH_SIZE, then flush them together"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._db_writes.get()]
+            deadline = loop.time() + DB_FLUSH_INTERVAL
+            while len(batch) < DB_FLUSH_BATCH_SIZE:
+                try:
+                    batch.append(await asyncio.wait_for(self._db_writes.get(), deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush_db_writes(batch)
+    
+    async def _flush_db_writes(self, batch: List[tuple]):
+        """Apply a batch of connection-record writes in one transaction"""
+        inserts: Dict[str, Dict[str, Any]] = {}
+        deletes: List[str] = []
+        for kind, value in batch:
+            if kind == "insert":
+                inserts[value["connection_id"]] = value
+            elif inserts.pop(value, None) is None:
+                # Connections opened and closed within one batch never reach the database
+                deletes.append(value)
+        
         try:
-            db.query(WebSocketConnection).filter(
-                WebSocketConnection.connection_id == connection_id
-            ).delete()
-            db.commit()
+            async with AsyncSessionLocal() as db:
+                if inserts:
+                    await db.execute(insert(WebSocketConnection), list(inserts.values()))
+                if deletes:
+                    await db.execute(
+                        delete(WebSocketConnection).where(WebSocketConnection.connection_id.in_(deletes))
+                    )
+                await db.commit()
         except Exception as e:
-            logger.error(f"Error removing connection from DB: {str(e)}")
-        finally:
-            db.close()
+            logger.error("Error writing %d connection records to DB: %s", len(batch), e)
+    
+    def start(self):
+        """Start the periodic sweep of closed and idle connections"""
+        if self.cleanup_task is None:
+            self.cleanup_task = asyncio.create_task(self._cleanup_loop())
+    
+    async def _cleanup_loop(self):
+        """Every heartbeat interval, drop connections whose socket closed or that went idle"""
+        while True:
+            await asyncio.sleep(settings.WS_HEARTBEAT_INTERVAL)
+            try:
+                await self._sweep_connections()
+            except Exception as e:
+                logger.error("Error sweeping WebSocket connections: %s", e)
+    
+    async def _sweep_connections(self):
+        """Disconnect stale connections in one pass over the connection table"""
+        idle_cutoff = time.monotonic() - settings.WS_IDLE_TIMEOUT if settings.WS_IDLE_TIMEOUT > 0 else None
+        stale = [
+            info for info in self.connections.values()
+            if info.websocket.client_state == WebSocketState.DISCONNECTED
+            or (idle_cutoff is not None and info.last_activity < idle_cutoff)
+        ]
+        for info in stale:
+            if info.websocket.client_state != WebSocketState.DISCONNECTED:
+                logger.info("Closing idle WebSocket connection %s", info.connection_id)
+                try:
+                    await info.websocket.close(code=1001)
+                except Exception:
+                    pass
+            await self.disconnect(info.connection_id)
+    
+    async def close(self):
+        """Flush pending connection-record writes and stop the background tasks"""
+        tasks = [t for t in (self.cleanup_task, self.db_flush_task, self.clock_task) if t]
+        tasks.extend(self._close_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.cleanup_task = self.db_flush_task = self.clock_task = None
+        
+        batch = []
+        while not self._db_writes.empty():
+            batch.append(self._db_writes.get_nowait())
+        if batch:
+            await self._flush_db_writes(batch)
     
     async def _update_connection_subscriptions_db(self, connection_id: str, subscriptions: List[str]):
         """Update connection subscriptions in database"""
@@ -0,0 +1,113 @@
+"""
+Cache Redis cho các response danh sách (GET /vehicles, GET /devices)
+"""
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import orjson
+import redis.asyncio as redis
+from fastapi.responses import Response
+
+from app.config import settings
+from app.pagination import TOTAL_COUNT_HEADER
+
+logger = logging.getLogger(__name__)
+
+# Bản stale được giữ lâu hơn để trả về khi database lỗi
+STALE_TTL_MULTIPLIER = 20
+
+_redis: Optional[redis.Redis] = None
+
+async def init_cache() -> None:
+    """
+    Tạo Redis client cho cache
+    """
+    global _redis
+    if _redis is None and settings.LIST_CACHE_TTL > 0:
+        _redis = redis.from_url(settings.REDIS_URL)
+
+async def close_cache() -> None:
+    """
+    Đóng Redis client
+    """
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+
+def _version_key(namespace: str) -> str:
+    return f"{namespace}:ver"
+
+def _page_response(entry: bytes, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Tạo response từ giá trị cache dạng b"<tổng số>\n<JSON>"
+    """
+    total, _, body = entry.partition(b"\n")
+    response = Response(content=body, media_type="application/json", headers=headers)
+    response.headers[TOTAL_COUNT_HEADER] = total.decode()
+    return response
+
+async def cached_list_response(
+    namespace: str,
+    params: Dict[str, Any],
+    loader: Callable[[], Awaitable[Tuple[Any, int]]]
+) -> Response:
+    """
+    Trả về trang JSON của loader kèm header X-Total-Count, cache theo namespace và tham số truy vấn
+
+    loader trả về (các dòng, tổng số). Key chứa version hiện tại của namespace nên invalidate()
+    chỉ cần INCR, không phải quét key. Lỗi Redis không làm hỏng request: khi đó loader được gọi trực tiếp.
+    """
+    params_key = orjson.dumps(params, option=orjson.OPT_SORT_KEYS).decode()
+    stale_key = f"{namespace}:stale:{params_key}"
+    key = None
+    if _redis is not None:
+        try:
+            version = await _redis.get(_version_key(namespace))
+            key = f"{namespace}:v{int(version or 0)}:{params_key}"
+            entry = await _redis.get(key)
+            if entry is not None:
+                return _page_response(entry)
+        except redis.RedisError as e:
+            logger.warning("Cache read failed for %s: %s", namespace, e)
+
+    try:
+        items, total = await loader()
+    except Exception:
+        # Database lỗi: trả về bản stale nếu còn
+        try:
+            stale = await _redis.get(stale_key) if _redis is not None else None
+        except redis.RedisError:
+            stale = None
+        if stale is None:
+            raise
+        logger.warning("Serving stale %s list after load failure", namespace)
+        return _page_response(stale, headers={"X-Cache": "stale"})
+
+    entry = b"%d\n%s" % (total, orjson.dumps(items))
+
+    if key is not None:
+        ttl = settings.LIST_CACHE_TTL
+        try:
+            async with _redis.pipeline(transaction=False) as pipe:
+                pipe.set(key, entry, ex=ttl)
+                pipe.set(stale_key, entry, ex=ttl * STALE_TTL_MULTIPLIER)
+                await pipe.execute()
+        except redis.RedisError as e:
+            logger.warning("Cache write failed for %s: %s", namespace, e)
+
+    return _page_response(entry)
+
+async def invalidate(*namespaces: str) -> None:
+    """
+    Làm mất hiệu lực cache của các namespace bằng cách tăng version
+    """
+    if _redis is None:
+        return
+    try:
+        async with _redis.pipeline(transaction=False) as pipe:
+            for namespace in namespaces:
+                pipe.incr(_version_key(namespace))
+            await pipe.execute()
+    except redis.RedisError as e:
+        logger.warning("Cache invalidation failed for %s: %s", namespaces, e)
@@ -1,5 +1,5 @@
-from pydantic_settings import BaseSettings
-from pydantic import model_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic import AliasChoices, Field, model_validator
 from typing import List, Union
 from functools import lru_cache
 
@@ -13,12 +13,19 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "DEBUG"
 
     # Database Configuration
-    VEHICLE_DB_URL: str
+    # k8s sets VEHICLE_DB_URL, docker-compose sets DATABASE_URL
+    VEHICLE_DB_URL: str = Field(validation_alias=AliasChoices("VEHICLE_DB_URL", "DATABASE_URL"))
     DB_POOL_SIZE: int = 10
     DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+
+    # Redis cache cho các endpoint danh sách (LIST_CACHE_TTL=0 để tắt)
+    REDIS_URL: str = "redis://redis:6379/4"
+    LIST_CACHE_TTL: int = 15
 
     # Service URLs
-    AUTH_SERVICE_URL: str
+    AUTH_SERVICE_URL: str = "http://auth-service:8001"
 
     # JWT Configuration (must match Auth Service)
     JWT_SECRET_KEY: str
@@ -36,11 +43,10 @@ class Settings(BaseSettings):
                 values['CORS_ORIGINS'] = [origin.strip() for origin in cors_origins.split(",")]
         return values
 
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    # Frozen: settings are read-only once loaded and the cached instance is safe to share
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True, frozen=True)
 
-@lru_cache()
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
     return Settings()
 
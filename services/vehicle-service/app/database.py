@@ -1,17 +1,19 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
 from app.config import settings
 
 # Tạo SQLAlchemy engine
 engine = create_async_engine(
-    settings.DATABASE_URL,
+    settings.VEHICLE_DB_URL,
     echo=settings.LOG_LEVEL == "DEBUG",
     pool_size=settings.DB_POOL_SIZE,
     max_overflow=settings.DB_MAX_OVERFLOW,
-    pool_timeout=settings.DB_POOL_TIMEOUT
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_pre_ping=True,  # Loại bỏ kết nối đã bị đóng khi idle
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_use_lifo=True  # Dùng lại kết nối mới nhất, để các kết nối thừa hết hạn khi tải giảm
 )
 
 # Tạo session factory
@@ -39,7 +41,6 @@ async def close_db():
     """
     await engine.dispose()
 
-@asynccontextmanager
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency để lấy database session
@@ -0,0 +1,31 @@
+"""
+Conditional GET (ETag / If-None-Match) cho các endpoint trả về một bản ghi
+"""
+import uuid
+from datetime import datetime
+from typing import Any, Optional
+
+from fastapi import Request
+from fastapi.responses import ORJSONResponse, Response
+
+def resource_etag(resource_id: uuid.UUID, updated_at: Optional[datetime]) -> str:
+    """
+    ETag của một bản ghi: đổi mỗi khi updated_at đổi
+    """
+    version = updated_at.isoformat() if updated_at is not None else "0"
+    return f'"{resource_id.hex}-{version}"'
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # So sánh yếu theo RFC 9110: bỏ tiền tố W/
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def conditional_response(request: Request, etag: str, content: Any) -> Response:
+    """
+    Trả về 304 nếu client đã có bản mới nhất, ngược lại trả về JSON kèm header ETag
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return ORJSONResponse(content, headers={"ETag": etag})
@@ -1,12 +1,14 @@
 from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
+import os
 import time
-import uuid
 from typing import Dict, Any
 
+from app.cache import init_cache, close_cache
 from app.database import init_db, close_db, get_db
+from app.pagination import TOTAL_COUNT_HEADER
 from app.config import settings
 from app.routes import vehicle_router, device_router
 from app.models import VehicleNotFoundError, DuplicateLicensePlateError
@@ -16,8 +18,10 @@ from prometheus_fastapi_instrumentator import Instrumentator
 async def lifespan(app: FastAPI):
     # Startup
     await init_db()
+    await init_cache()
     yield
     # Shutdown
+    await close_cache()
     await close_db()
 
 # Khởi tạo FastAPI app
@@ -25,7 +29,8 @@ app = FastAPI(
     title="Vehicle Service",
     description="Quản lý thông tin xe và thiết bị GPS",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Instrument the app for Prometheus
@@ -38,29 +43,38 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[TOTAL_COUNT_HEADER],
 )
 
 # Request ID middleware
+# Health checks and Prometheus scrapes skip request IDs and timing
+_UNTRACKED_PATHS = frozenset(("/health", "/metrics"))
+
 @app.middleware("http")
 async def add_request_id(request: Request, call_next):
-    start_time = time.time()
+    if request.url.path in _UNTRACKED_PATHS:
+        return await call_next(request)
+    
+    start_ns = time.perf_counter_ns()
     
     # Tạo request ID nếu chưa có
-    request_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
+    request_id = request.headers.get("X-Request-ID")
+    if request_id is None:
+        request_id = os.urandom(8).hex()
     request.state.request_id = request_id
     
     response = await call_next(request)
     
     # Thêm request ID và processing time vào response headers
     response.headers["X-Request-ID"] = request_id
-    response.headers["X-Process-Time"] = str(time.time() - start_time)
+    response.headers["X-Process-Time"] = f"{(time.perf_counter_ns() - start_ns) / 1e6:.2f}ms"
     
     return response
 
 # Error handlers
 @app.exception_handler(VehicleNotFoundError)
 async def vehicle_not_found_handler(request: Request, exc: VehicleNotFoundError):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=404,
         content={
             "error": "vehicle_not_found",
@@ -71,7 +85,7 @@ async def vehicle_not_found_handler(request: Request, exc: VehicleNotFoundError)
 
 @app.exception_handler(DuplicateLicensePlateError)
 async def duplicate_license_plate_handler(request: Request, exc: DuplicateLicensePlateError):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=409,
         content={
             "error": "duplicate_license_plate",
@@ -44,15 +44,17 @@ class Device(Base):
     def to_dict(self):
         """
         Chuyển đổi model thành dictionary
+        
+        UUID và datetime được giữ nguyên; orjson tự mã hoá chúng trong response
         """
         return {
-            "id": str(self.id),
-            "vehicle_id": str(self.vehicle_id),
+            "id": self.id,
+            "vehicle_id": self.vehicle_id,
             "imei": self.imei,
             "sim_card": self.sim_card,
             "model": self.model,
             "status": self.status.value,
-            "last_heartbeat": self.last_heartbeat.isoformat() if self.last_heartbeat else None,
-            "created_at": self.created_at.isoformat(),
-            "updated_at": self.updated_at.isoformat()
+            "last_heartbeat": self.last_heartbeat,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
         }
@@ -51,14 +51,16 @@ class Vehicle(Base):
     def to_dict(self):
         """
         Chuyển đổi model thành dictionary
+        
+        UUID và datetime được giữ nguyên; orjson tự mã hoá chúng trong response
         """
         return {
-            "id": str(self.id),
+            "id": self.id,
             "name": self.name,
             "license_plate": self.license_plate,
             "type": self.type.value,
             "status": self.status.value,
             "description": self.description,
-            "created_at": self.created_at.isoformat(),
-            "updated_at": self.updated_at.isoformat()
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
         }
@@ -0,0 +1,31 @@
+"""
+Phân trang các endpoint danh sách kèm tổng số dòng
+"""
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+async def fetch_page(db: AsyncSession, query: Select, skip: int, limit: int) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Trả về (các dòng của trang, tổng số dòng khớp bộ lọc)
+
+    Tổng số lấy bằng COUNT(*) OVER () trong cùng câu truy vấn với trang, không cần
+    SELECT COUNT(*) riêng. Chỉ khi trang rỗng mà skip > 0 mới phải đếm riêng.
+    """
+    page = query.add_columns(func.count().over().label("_total")).offset(skip).limit(limit)
+    result = await db.execute(page)
+
+    items = []
+    total = 0
+    for row in result.mappings():
+        item = dict(row)
+        total = item.pop("_total")
+        items.append(item)
+
+    if not items and skip:
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
+
+    return items, total
@@ -1,26 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Path, Body
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Path, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete
-from typing import List, Optional, Dict, Any
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from pydantic import BaseModel
+from typing import Annotated, List, Optional
+import datetime
 import uuid
 
+from app.cache import cached_list_response, invalidate
 from app.database import get_db
+from app.etag import conditional_response, resource_etag
+from app.pagination import fetch_page
 from app.models import Device, DeviceStatus, DeviceNotFoundError, Vehicle, VehicleNotFoundError
 
 router = APIRouter()
 
+# Số thiết bị tối đa trong một lần tạo hàng loạt
+BULK_CREATE_LIMIT = 1000
+
+# PostgreSQL SQLSTATE cho vi phạm khóa ngoại và ràng buộc unique
+FOREIGN_KEY_VIOLATION = "23503"
+UNIQUE_VIOLATION = "23505"
+
+class DeviceCreate(BaseModel):
+    """
+    Dữ liệu tạo thiết bị GPS mới; xe lấy từ đường dẫn
+    """
+    imei: str
+    sim_card: Optional[str] = None
+    model: Optional[str] = None
+    status: DeviceStatus = DeviceStatus.ACTIVE
+
+class DeviceUpdate(BaseModel):
+    """
+    Dữ liệu cập nhật thiết bị GPS; chỉ các trường được gửi lên mới được cập nhật
+    """
+    vehicle_id: Optional[uuid.UUID] = None
+    imei: Optional[str] = None
+    sim_card: Optional[str] = None
+    model: Optional[str] = None
+    status: Optional[DeviceStatus] = None
+    last_heartbeat: Optional[datetime.datetime] = None
+
+# Các cột trả về ở endpoint danh sách, cùng khóa với to_dict(); đọc bằng Core, không tạo đối tượng ORM
+_LIST_COLUMNS = tuple(Device.__table__.c)
+
 @router.get("/devices")
 async def get_devices(
     vehicle_id: Optional[uuid.UUID] = None,
     status: Optional[DeviceStatus] = None,
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
+    skip: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Lấy danh sách thiết bị GPS với các bộ lọc
+    Lấy danh sách thiết bị GPS với các bộ lọc; tổng số thiết bị khớp bộ lọc nằm trong header X-Total-Count
     """
-    query = select(Device)
+    query = select(*_LIST_COLUMNS)
     
     # Áp dụng các bộ lọc
     if vehicle_id:
@@ -29,114 +66,154 @@ async def get_devices(
         query = query.where(Device.status == status)
     
     # Phân trang
-    query = query.offset(skip).limit(limit)
-    
-    result = await db.execute(query)
-    devices = result.scalars().all()
+    async def load():
+        return await fetch_page(db, query, skip, limit)
     
-    return [device.to_dict() for device in devices]
+    params = {"vehicle_id": vehicle_id, "status": status, "skip": skip, "limit": limit}
+    return await cached_list_response("devices", params, load)
 
 @router.get("/devices/{device_id}")
 async def get_device(
-    device_id: uuid.UUID = Path(..., title="Device ID"),
+    request: Request,
+    device_id: Annotated[uuid.UUID, Path(title="Device ID")],
     db: AsyncSession = Depends(get_db)
 ):
     """
     Lấy thông tin chi tiết của một thiết bị GPS
     """
-    result = await db.execute(select(Device).where(Device.id == device_id))
-    device = result.scalar_one_or_none()
+    # Tra theo khóa chính; Device không có relationship nên không có lazy load nào
+    device = await db.get(Device, device_id)
     
     if not device:
         raise DeviceNotFoundError(str(device_id))
     
-    return device.to_dict()
+    # 304 khi If-None-Match khớp, không cần gửi lại nội dung
+    return conditional_response(request, resource_etag(device.id, device.updated_at), device.to_dict())
 
 @router.post("/vehicles/{vehicle_id}/devices")
 async def create_device(
-    vehicle_id: uuid.UUID = Path(..., title="Vehicle ID"),
-    device_data: Dict[str, Any] = Body(...),
+    vehicle_id: Annotated[uuid.UUID, Path(title="Vehicle ID")],
+    device_data: DeviceCreate,
     db: AsyncSession = Depends(get_db)
 ):
     """
     Tạo thiết bị GPS mới cho xe
     """
-    # Kiểm tra xe tồn tại
-    result = await db.execute(select(Vehicle).where(Vehicle.id == vehicle_id))
-    vehicle = result.scalar_one_or_none()
-    
-    if not vehicle:
-        raise VehicleNotFoundError(str(vehicle_id))
-    
-    # Kiểm tra IMEI đã tồn tại chưa
-    result = await db.execute(select(Device).where(Device.imei == device_data["imei"]))
-    if result.scalar_one_or_none():
-        raise HTTPException(status_code=409, detail=f"Device with IMEI {device_data['imei']} already exists")
-    
-    # Tạo thiết bị mới
-    device = Device(
-        vehicle_id=vehicle_id,
-        imei=device_data["imei"],
-        sim_card=device_data.get("sim_card"),
-        model=device_data.get("model"),
-        status=device_data.get("status", DeviceStatus.ACTIVE)
+    # Tạo thiết bị mới trong một câu lệnh: khóa ngoại kiểm tra xe tồn tại,
+    # ràng buộc unique của IMEI thay cho SELECT kiểm tra trước
+    stmt = (
+        pg_insert(Device)
+        .values(vehicle_id=vehicle_id, **device_data.model_dump())
+        .on_conflict_do_nothing(index_elements=[Device.imei])
+        .returning(Device)
     )
+    try:
+        device = (await db.execute(stmt)).scalar_one_or_none()
+    except IntegrityError as e:
+        await db.rollback()
+        if getattr(e.orig, "pgcode", None) == FOREIGN_KEY_VIOLATION:
+            raise VehicleNotFoundError(str(vehicle_id))
+        raise
+    
+    # Không có dòng trả về nghĩa là IMEI đã tồn tại
+    if device is None:
+        raise HTTPException(status_code=409, detail=f"Device with IMEI {device_data.imei} already exists")
     
-    db.add(device)
     await db.commit()
-    await db.refresh(device)
+    await invalidate("devices")
     
     return device.to_dict()
 
+@router.post("/vehicles/{vehicle_id}/devices/bulk")
+async def create_devices_bulk(
+    vehicle_id: Annotated[uuid.UUID, Path(title="Vehicle ID")],
+    devices_data: Annotated[List[DeviceCreate], Body(min_length=1, max_length=BULK_CREATE_LIMIT)],
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Tạo nhiều thiết bị GPS cho xe trong một câu lệnh
+
+    Thiết bị có IMEI đã tồn tại (hoặc lặp lại trong cùng lô) được bỏ qua và trả về trong "conflicts".
+    """
+    stmt = (
+        pg_insert(Device)
+        .values([{"vehicle_id": vehicle_id, **device_data.model_dump()} for device_data in devices_data])
+        .on_conflict_do_nothing(index_elements=[Device.imei])
+        .returning(Device)
+    )
+    try:
+        devices = (await db.execute(stmt)).scalars().all()
+    except IntegrityError as e:
+        await db.rollback()
+        if getattr(e.orig, "pgcode", None) == FOREIGN_KEY_VIOLATION:
+            raise VehicleNotFoundError(str(vehicle_id))
+        raise
+    
+    await db.commit()
+    if devices:
+        await invalidate("devices")
+    
+    # IMEI không có trong RETURNING là IMEI đã tồn tại; IMEI lặp lại trong lô chỉ được
+    # chèn ở lần đầu, các lần sau đều là conflict
+    created_imeis = {device.imei for device in devices}
+    seen = set()
+    conflicts = []
+    for device_data in devices_data:
+        if device_data.imei in seen or device_data.imei not in created_imeis:
+            conflicts.append(device_data.imei)
+        seen.add(device_data.imei)
+    
+    return {
+        "created": [device.to_dict() for device in devices],
+        "conflicts": conflicts
+    }
+
 @router.put("/devices/{device_id}")
 async def update_device(
-    device_id: uuid.UUID = Path(..., title="Device ID"),
-    device_data: Dict[str, Any] = Body(...),
+    device_id: Annotated[uuid.UUID, Path(title="Device ID")],
+    device_data: DeviceUpdate,
     db: AsyncSession = Depends(get_db)
 ):
     """
     Cập nhật thông tin thiết bị GPS
     """
-    # Kiểm tra thiết bị tồn tại
-    result = await db.execute(select(Device).where(Device.id == device_id))
-    device = result.scalar_one_or_none()
-    
-    if not device:
+    # Cập nhật và lấy lại dòng trong một câu lệnh; ràng buộc unique kiểm tra IMEI
+    values = device_data.model_dump(exclude_unset=True)
+    stmt = update(Device).where(Device.id == device_id).values(**values).returning(Device)
+    try:
+        device = (await db.execute(stmt)).scalar_one_or_none()
+    except IntegrityError as e:
+        await db.rollback()
+        pgcode = getattr(e.orig, "pgcode", None)
+        if pgcode == UNIQUE_VIOLATION:
+            raise HTTPException(status_code=409, detail=f"Device with IMEI {device_data.imei} already exists")
+        if pgcode == FOREIGN_KEY_VIOLATION:
+            raise VehicleNotFoundError(str(device_data.vehicle_id))
+        raise
+    
+    if device is None:
         raise DeviceNotFoundError(str(device_id))
     
-    # Kiểm tra IMEI nếu có thay đổi
-    if "imei" in device_data and device_data["imei"] != device.imei:
-        result = await db.execute(select(Device).where(Device.imei == device_data["imei"]))
-        if result.scalar_one_or_none():
-            raise HTTPException(status_code=409, detail=f"Device with IMEI {device_data['imei']} already exists")
-    
-    # Cập nhật thông tin
-    for key, value in device_data.items():
-        if hasattr(device, key):
-            setattr(device, key, value)
-    
     await db.commit()
-    await db.refresh(device)
+    await invalidate("devices")
     
     return device.to_dict()
 
 @router.delete("/devices/{device_id}")
 async def delete_device(
-    device_id: uuid.UUID = Path(..., title="Device ID"),
+    device_id: Annotated[uuid.UUID, Path(title="Device ID")],
     db: AsyncSession = Depends(get_db)
 ):
     """
     Xóa thiết bị GPS
     """
-    # Kiểm tra thiết bị tồn tại
-    result = await db.execute(select(Device).where(Device.id == device_id))
-    device = result.scalar_one_or_none()
+    # Xóa trong một câu lệnh; rowcount bằng 0 nghĩa là thiết bị không tồn tại
+    result = await db.execute(delete(Device).where(Device.id == device_id))
     
-    if not device:
+    if result.rowcount == 0:
         raise DeviceNotFoundError(str(device_id))
     
-    # Xóa thiết bị
-    await db.delete(device)
     await db.commit()
+    await invalidate("devices")
     
     return {"message": f"Device with ID {device_id} deleted successfully"}
@@ -1,27 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Path, Body
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete
-from typing import List, Optional, Dict, Any
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from pydantic import BaseModel
+from typing import Annotated, List, Optional
 import uuid
 
+from app.cache import cached_list_response, invalidate
 from app.database import get_db
+from app.etag import conditional_response, resource_etag
+from app.pagination import fetch_page
 from app.models import Vehicle, VehicleStatus, VehicleType, VehicleNotFoundError, DuplicateLicensePlateError
 
 router = APIRouter()
 
+# PostgreSQL SQLSTATE cho vi phạm ràng buộc unique
+UNIQUE_VIOLATION = "23505"
+
+class VehicleCreate(BaseModel):
+    """
+    Dữ liệu tạo xe mới
+    """
+    name: str
+    license_plate: str
+    type: VehicleType
+    status: VehicleStatus = VehicleStatus.ACTIVE
+    description: Optional[str] = None
+
+class VehicleUpdate(BaseModel):
+    """
+    Dữ liệu cập nhật xe; chỉ các trường được gửi lên mới được cập nhật
+    """
+    name: Optional[str] = None
+    license_plate: Optional[str] = None
+    type: Optional[VehicleType] = None
+    status: Optional[VehicleStatus] = None
+    description: Optional[str] = None
+
+# Các cột trả về ở endpoint danh sách, cùng khóa với to_dict(); đọc bằng Core, không tạo đối tượng ORM
+_LIST_COLUMNS = tuple(Vehicle.__table__.c)
+
 @router.get("/vehicles")
 async def get_vehicles(
     status: Optional[VehicleStatus] = None,
     type: Optional[VehicleType] = None,
     search: Optional[str] = None,
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
+    skip: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Lấy danh sách xe với các bộ lọc
+    Lấy danh sách xe với các bộ lọc; tổng số xe khớp bộ lọc nằm trong header X-Total-Count
     """
-    query = select(Vehicle)
+    query = select(*_LIST_COLUMNS)
     
     # Áp dụng các bộ lọc
     if status:
@@ -35,110 +67,100 @@ async def get_vehicles(
         )
     
     # Phân trang
-    query = query.offset(skip).limit(limit)
-    
-    result = await db.execute(query)
-    vehicles = result.scalars().all()
+    async def load():
+        return await fetch_page(db, query, skip, limit)
     
-    return [vehicle.to_dict() for vehicle in vehicles]
+    params = {"status": status, "type": type, "search": search, "skip": skip, "limit": limit}
+    return await cached_list_response("vehicles", params, load)
 
 @router.get("/vehicles/{vehicle_id}")
 async def get_vehicle(
-    vehicle_id: uuid.UUID = Path(..., title="Vehicle ID"),
+    request: Request,
+    vehicle_id: Annotated[uuid.UUID, Path(title="Vehicle ID")],
     db: AsyncSession = Depends(get_db)
 ):
     """
     Lấy thông tin chi tiết của một xe
     """
-    result = await db.execute(select(Vehicle).where(Vehicle.id == vehicle_id))
-    vehicle = result.scalar_one_or_none()
+    # Tra theo khóa chính; Vehicle không có relationship nên không có lazy load nào
+    vehicle = await db.get(Vehicle, vehicle_id)
     
     if not vehicle:
         raise VehicleNotFoundError(str(vehicle_id))
     
-    return vehicle.to_dict()
+    # 304 khi If-None-Match khớp, không cần gửi lại nội dung
+    return conditional_response(request, resource_etag(vehicle.id, vehicle.updated_at), vehicle.to_dict())
 
 @router.post("/vehicles")
 async def create_vehicle(
-    vehicle_data: Dict[str, Any] = Body(...),
+    vehicle_data: VehicleCreate,
     db: AsyncSession = Depends(get_db)
 ):
     """
     Tạo xe mới
     """
-    # Kiểm tra biển số xe đã tồn tại chưa
-    result = await db.execute(
-        select(Vehicle).where(Vehicle.license_plate == vehicle_data["license_plate"])
+    # Tạo xe mới; ràng buộc unique của biển số thay cho SELECT kiểm tra trước
+    stmt = (
+        pg_insert(Vehicle)
+        .values(**vehicle_data.model_dump())
+        .on_conflict_do_nothing(index_elements=[Vehicle.license_plate])
+        .returning(Vehicle)
     )
-    if result.scalar_one_or_none():
-        raise DuplicateLicensePlateError(vehicle_data["license_plate"])
+    vehicle = (await db.execute(stmt)).scalar_one_or_none()
     
-    # Tạo xe mới
-    vehicle = Vehicle(
-        name=vehicle_data["name"],
-        license_plate=vehicle_data["license_plate"],
-        type=vehicle_data["type"],
-        status=vehicle_data.get("status", VehicleStatus.ACTIVE),
-        description=vehicle_data.get("description")
-    )
+    # Không có dòng trả về nghĩa là biển số đã tồn tại
+    if vehicle is None:
+        raise DuplicateLicensePlateError(vehicle_data.license_plate)
     
-    db.add(vehicle)
     await db.commit()
-    await db.refresh(vehicle)
+    await invalidate("vehicles")
     
     return vehicle.to_dict()
 
 @router.put("/vehicles/{vehicle_id}")
 async def update_vehicle(
-    vehicle_id: uuid.UUID = Path(..., title="Vehicle ID"),
-    vehicle_data: Dict[str, Any] = Body(...),
+    vehicle_id: Annotated[uuid.UUID, Path(title="Vehicle ID")],
+    vehicle_data: VehicleUpdate,
     db: AsyncSession = Depends(get_db)
 ):
     """
     Cập nhật thông tin xe
     """
-    # Kiểm tra xe tồn tại
-    result = await db.execute(select(Vehicle).where(Vehicle.id == vehicle_id))
-    vehicle = result.scalar_one_or_none()
-    
-    if not vehicle:
+    # Cập nhật và lấy lại dòng trong một câu lệnh; ràng buộc unique kiểm tra biển số
+    values = vehicle_data.model_dump(exclude_unset=True)
+    stmt = update(Vehicle).where(Vehicle.id == vehicle_id).values(**values).returning(Vehicle)
+    try:
+        vehicle = (await db.execute(stmt)).scalar_one_or_none()
+    except IntegrityError as e:
+        await db.rollback()
+        if getattr(e.orig, "pgcode", None) == UNIQUE_VIOLATION:
+            raise DuplicateLicensePlateError(vehicle_data.license_plate)
+        raise
+    
+    if vehicle is None:
         raise VehicleNotFoundError(str(vehicle_id))
     
-    # Kiểm tra biển số xe nếu có thay đổi
-    if "license_plate" in vehicle_data and vehicle_data["license_plate"] != vehicle.license_plate:
-        result = await db.execute(
-            select(Vehicle).where(Vehicle.license_plate == vehicle_data["license_plate"])
-        )
-        if result.scalar_one_or_none():
-            raise DuplicateLicensePlateError(vehicle_data["license_plate"])
-    
-    # Cập nhật thông tin
-    for key, value in vehicle_data.items():
-        if hasattr(vehicle, key):
-            setattr(vehicle, key, value)
-    
     await db.commit()
-    await db.refresh(vehicle)
+    await invalidate("vehicles")
     
     return vehicle.to_dict()
 
 @router.delete("/vehicles/{vehicle_id}")
 async def delete_vehicle(
-    vehicle_id: uuid.UUID = Path(..., title="Vehicle ID"),
+    vehicle_id: Annotated[uuid.UUID, Path(title="Vehicle ID")],
     db: AsyncSession = Depends(get_db)
 ):
     """
     Xóa xe
     """
-    # Kiểm tra xe tồn tại
-    result = await db.execute(select(Vehicle).where(Vehicle.id == vehicle_id))
-    vehicle = result.scalar_one_or_none()
+    # Xóa trong một câu lệnh; rowcount bằng 0 nghĩa là xe không tồn tại
+    result = await db.execute(delete(Vehicle).where(Vehicle.id == vehicle_id))
     
-    if not vehicle:
+    if result.rowcount == 0:
         raise VehicleNotFoundError(str(vehicle_id))
     
-    # Xóa xe
-    await db.delete(vehicle)
     await db.commit()
+    # ON DELETE SET NULL thay đổi cả các thiết bị của xe
+    await invalidate("vehicles", "devices")
     
     return {"message": f"Vehicle with ID {vehicle_id} deleted successfully"}
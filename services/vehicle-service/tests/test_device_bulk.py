@@ -0,0 +1,78 @@
+"""
+Unit test cho POST /vehicles/{id}/devices/bulk
+"""
+import uuid
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.models import Device
+from app.routes.device_router import DeviceCreate, create_devices_bulk
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self._rows
+
+
+class FakeBulkSession:
+    """
+    Giả lập INSERT ... ON CONFLICT (imei) DO NOTHING RETURNING trên một bảng devices có sẵn
+    """
+    def __init__(self, existing_imeis):
+        self.imeis = set(existing_imeis)
+        self.inserted = []
+        self.committed = False
+
+    async def execute(self, stmt):
+        params = stmt.compile(dialect=postgresql.dialect()).params
+        rows = []
+        row_count = sum(1 for name in params if name.startswith("imei_m"))
+        for index in range(row_count):
+            imei = params[f"imei_m{index}"]
+            if imei in self.imeis:
+                continue
+            self.imeis.add(imei)
+            rows.append(Device(
+                vehicle_id=params[f"vehicle_id_m{index}"],
+                imei=imei,
+                status=params[f"status_m{index}"]
+            ))
+        self.inserted.extend(rows)
+        return FakeResult(rows)
+
+    async def commit(self):
+        self.committed = True
+
+    async def rollback(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_reports_existing_and_in_batch_duplicates():
+    db = FakeBulkSession(existing_imeis={"A"})
+    devices_data = [DeviceCreate(imei=imei) for imei in ("B", "A", "B", "C", "B")]
+
+    result = await create_devices_bulk(uuid.uuid4(), devices_data, db)
+
+    assert [device["imei"] for device in result["created"]] == ["B", "C"]
+    assert result["conflicts"] == ["A", "B", "B"]
+    assert db.committed
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_without_conflicts():
+    vehicle_id = uuid.uuid4()
+    db = FakeBulkSession(existing_imeis=())
+
+    result = await create_devices_bulk(vehicle_id, [DeviceCreate(imei="A"), DeviceCreate(imei="B")], db)
+
+    assert [device["imei"] for device in result["created"]] == ["A", "B"]
+    assert all(device["vehicle_id"] == vehicle_id for device in result["created"])
+    assert result["conflicts"] == []
@@ -0,0 +1,63 @@
+"""
+Unit test cho conditional GET (ETag / If-None-Match)
+"""
+import uuid
+from datetime import datetime
+
+from starlette.requests import Request
+
+from app.etag import conditional_response, resource_etag
+
+RESOURCE_ID = uuid.UUID("12345678-1234-5678-1234-567812345678")
+ETAG = resource_etag(RESOURCE_ID, datetime(2024, 1, 2, 3, 4, 5))
+CONTENT = {"id": str(RESOURCE_ID), "status": "active"}
+
+
+def make_request(if_none_match=None):
+    headers = [] if if_none_match is None else [(b"if-none-match", if_none_match.encode())]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_etag_changes_with_updated_at():
+    assert ETAG == '"12345678123456781234567812345678-2024-01-02T03:04:05"'
+    assert resource_etag(RESOURCE_ID, datetime(2024, 1, 2, 3, 4, 6)) != ETAG
+    assert resource_etag(RESOURCE_ID, None) == '"12345678123456781234567812345678-0"'
+
+
+def test_matching_etag_returns_304():
+    response = conditional_response(make_request(ETAG), ETAG, CONTENT)
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == ETAG
+    assert response.body == b""
+
+
+def test_weak_etag_matches():
+    response = conditional_response(make_request(f"W/{ETAG}"), ETAG, CONTENT)
+
+    assert response.status_code == 304
+
+
+def test_etag_in_comma_separated_list_matches():
+    response = conditional_response(make_request(f'"other", W/"stale" , {ETAG}'), ETAG, CONTENT)
+
+    assert response.status_code == 304
+
+
+def test_wildcard_matches():
+    assert conditional_response(make_request("*"), ETAG, CONTENT).status_code == 304
+
+
+def test_mismatch_returns_200_with_body():
+    response = conditional_response(make_request('"other", W/"stale"'), ETAG, CONTENT)
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == ETAG
+    assert response.body == b'{"id":"12345678-1234-5678-1234-567812345678","status":"active"}'
+
+
+def test_missing_header_returns_200():
+    response = conditional_response(make_request(), ETAG, CONTENT)
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == ETAG
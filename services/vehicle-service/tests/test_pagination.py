@@ -0,0 +1,128 @@
+"""
+Unit test cho phân trang kèm tổng số dòng và cache danh sách
+"""
+import pytest
+from sqlalchemy import select
+
+from app import cache
+from app.models import Vehicle
+from app.pagination import TOTAL_COUNT_HEADER, fetch_page
+
+
+class FakeMappings:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def mappings(self):
+        return iter(self._rows)
+
+
+class FakePageSession:
+    """
+    Trả về các dòng cố định cho câu truy vấn trang và một giá trị cho câu COUNT riêng
+    """
+    def __init__(self, rows, count=None):
+        self.rows = rows
+        self.count = count
+        self.pages = []
+        self.counts = []
+
+    async def execute(self, statement):
+        self.pages.append(statement)
+        return FakeMappings(self.rows)
+
+    async def scalar(self, statement):
+        self.counts.append(statement)
+        return self.count
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def set(self, key, value, ex=None):
+        self.redis.store[key] = value
+
+    def incr(self, key):
+        self.redis.store[key] = int(self.redis.store.get(key, 0)) + 1
+
+    async def execute(self):
+        pass
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+QUERY = select(Vehicle.id, Vehicle.license_plate)
+
+
+@pytest.mark.asyncio
+async def test_total_comes_from_the_page_query():
+    db = FakePageSession(rows=[
+        {"id": 1, "license_plate": "29A-00001", "_total": 57},
+        {"id": 2, "license_plate": "29A-00002", "_total": 57}
+    ])
+
+    items, total = await fetch_page(db, QUERY, skip=0, limit=2)
+
+    assert total == 57
+    assert items == [{"id": 1, "license_plate": "29A-00001"}, {"id": 2, "license_plate": "29A-00002"}]
+    assert "count(*) OVER ()" in str(db.pages[0])
+    assert db.counts == []
+
+
+@pytest.mark.asyncio
+async def test_skip_past_the_end_falls_back_to_count_query():
+    db = FakePageSession(rows=[], count=57)
+
+    items, total = await fetch_page(db, QUERY, skip=100, limit=20)
+
+    assert items == []
+    assert total == 57
+    assert len(db.counts) == 1
+
+
+@pytest.mark.asyncio
+async def test_empty_first_page_skips_count_query():
+    db = FakePageSession(rows=[], count=57)
+
+    items, total = await fetch_page(db, QUERY, skip=0, limit=20)
+
+    assert (items, total) == ([], 0)
+    assert db.counts == []
+
+
+@pytest.mark.asyncio
+async def test_cached_total_is_served_from_redis(monkeypatch):
+    monkeypatch.setattr(cache, "_redis", FakeRedis())
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return [{"id": 1}], 57
+
+    first = await cache.cached_list_response("vehicles", {"skip": 0, "limit": 1}, loader)
+    second = await cache.cached_list_response("vehicles", {"skip": 0, "limit": 1}, loader)
+
+    assert len(calls) == 1
+    assert first.headers[TOTAL_COUNT_HEADER] == second.headers[TOTAL_COUNT_HEADER] == "57"
+    assert second.body == b'[{"id":1}]'
+
+    # Sau khi invalidate, version mới buộc loader chạy lại
+    await cache.invalidate("vehicles")
+    await cache.cached_list_response("vehicles", {"skip": 0, "limit": 1}, loader)
+    assert len(calls) == 2
@@ -1,12 +1,14 @@
 """Common authentication utilities for Fleet Tracker services"""
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, FrozenSet, Union
 from datetime import datetime, timedelta
+from functools import lru_cache
+import time
 import jwt
-from pydantic import BaseModel
+import msgspec
 from .exceptions import AuthenticationError, AuthorizationError
 
-class UserClaims(BaseModel):
-    """User claims structure for JWT tokens"""
+class UserClaims(msgspec.Struct, frozen=True):
+    """User claims structure for JWT tokens (frozen: decoded claims are cached and shared)"""
     user_id: str
     email: str
     role: str
@@ -17,28 +19,42 @@ class UserClaims(BaseModel):
 class TokenValidator:
     """JWT token validation utility"""
     
+    # Verified tokens kept per validator; a bearer token is typically reused for many requests
+    DECODE_CACHE_SIZE = 4096
+    
+    # Tokens are issued without an audience; exp and iat are always set by the auth service
+    DECODE_OPTIONS = {"verify_aud": False, "require": ["exp", "iat"]}
+    
     def __init__(self, secret_key: str, algorithm: str = "HS256"):
         self.secret_key = secret_key
         self.algorithm = algorithm
+        # HMAC key as bytes once, instead of encoding the secret on every decode
+        self._key = secret_key.encode() if isinstance(secret_key, str) else secret_key
+        self._algorithms = [algorithm]
+        # Only successful decodes are cached; invalid tokens are verified every time
+        self._decode_cached = lru_cache(maxsize=self.DECODE_CACHE_SIZE)(self._decode)
+    
+    def _decode(self, token: str) -> UserClaims:
+        payload = jwt.decode(token, self._key, algorithms=self._algorithms, options=self.DECODE_OPTIONS)
+        return msgspec.convert(payload, UserClaims)
     
     def decode_token(self, token: str) -> UserClaims:
         """Decode and validate JWT token"""
         try:
-            payload = jwt.decode(
-                token, 
-                self.secret_key, 
-                algorithms=[self.algorithm]
-            )
-            return UserClaims(**payload)
+            claims = self._decode_cached(token)
         except jwt.ExpiredSignatureError:
             raise AuthenticationError("Token has expired")
-        except jwt.InvalidTokenError:
+        except (jwt.InvalidTokenError, msgspec.ValidationError):
             raise AuthenticationError("Invalid token")
+        # A cached token may have expired since it was verified
+        if claims.exp <= time.time():
+            raise AuthenticationError("Token has expired")
+        return claims
     
     def create_token(self, user_claims: UserClaims, expires_in_hours: int = 24) -> str:
         """Create JWT token from user claims"""
         now = datetime.utcnow()
-        claims = user_claims.dict()
+        claims = msgspec.structs.asdict(user_claims)
         claims.update({
             'iat': int(now.timestamp()),
             'exp': int((now + timedelta(hours=expires_in_hours)).timestamp())
@@ -46,24 +62,30 @@ class TokenValidator:
         
         return jwt.encode(claims, self.secret_key, algorithm=self.algorithm)
 
+_NO_PERMISSIONS: FrozenSet[str] = frozenset()
+
 class PermissionChecker:
     """Permission checking utility"""
     
-    ROLE_PERMISSIONS = {
-        'admin': [
-            'vehicle:create', 'vehicle:read', 'vehicle:update', 'vehicle:delete',
-            'location:read', 'alert:read', 'alert:resolve', 'user:manage'
-        ],
-        'manager': [
-            'vehicle:create', 'vehicle:read', 'vehicle:update',
-            'location:read', 'alert:read', 'alert:resolve'
-        ],
-        'operator': [
-            'vehicle:read', 'location:read', 'alert:read'
-        ],
-        'viewer': [
-            'vehicle:read', 'location:read'
-        ]
+    # Keys are lowercase role names; frozensets make each check a hash lookup
+    ROLE_PERMISSIONS: Dict[str, FrozenSet[str]] = {
+        role: frozenset(permissions)
+        for role, permissions in {
+            'admin': [
+                'vehicle:create', 'vehicle:read', 'vehicle:update', 'vehicle:delete',
+                'location:read', 'alert:read', 'alert:resolve', 'user:manage'
+            ],
+            'manager': [
+                'vehicle:create', 'vehicle:read', 'vehicle:update',
+                'location:read', 'alert:read', 'alert:resolve'
+            ],
+            'operator': [
+                'vehicle:read', 'location:read', 'alert:read'
+            ],
+            'viewer': [
+                'vehicle:read', 'location:read'
+            ]
+        }.items()
     }
     
     @classmethod
@@ -73,8 +95,10 @@ class PermissionChecker:
         if user_permissions and required_permission in user_permissions:
             return True
         
-        # Check role-based permissions
-        role_permissions = cls.ROLE_PERMISSIONS.get(user_role.lower(), [])
+        # Check role-based permissions; roles are normally issued lowercase already
+        role_permissions = cls.ROLE_PERMISSIONS.get(user_role)
+        if role_permissions is None:
+            role_permissions = cls.ROLE_PERMISSIONS.get(user_role.lower(), _NO_PERMISSIONS)
         return required_permission in role_permissions
     
     @classmethod
@@ -90,12 +114,23 @@ class PermissionChecker:
                 }
             )
 
-def extract_bearer_token(authorization_header: Optional[str]) -> Optional[str]:
-    """Extract bearer token from Authorization header"""
+_BEARER_PREFIX = "Bearer "
+_BEARER_PREFIX_BYTES = b"Bearer "
+
+def extract_bearer_token(authorization_header: Union[str, bytes, None]) -> Optional[str]:
+    """Extract bearer token from Authorization header
+    
+    Also accepts the raw bytes value from ``request.headers.raw`` so callers can skip header decoding.
+    """
     if not authorization_header:
         return None
     
-    if not authorization_header.startswith('Bearer '):
+    if isinstance(authorization_header, bytes):
+        if not authorization_header.startswith(_BEARER_PREFIX_BYTES):
+            return None
+        return authorization_header[7:].decode('latin-1')
+    
+    if not authorization_header.startswith(_BEARER_PREFIX):
         return None
     
     return authorization_header[7:]  # Remove 'Bearer ' prefix
@@ -1,15 +1,23 @@
 import logging
 import sys
-from typing import Optional
+from typing import Dict, Optional
 from datetime import datetime
 
 class ServiceLogger:
     """Centralized logging utility for microservices"""
     
-    @staticmethod
-    def get_logger(service_name: str, level: str = "INFO") -> logging.Logger:
+    # Configured loggers by service name, so the per-request helpers skip getLogger's lock
+    _loggers: Dict[str, logging.Logger] = {}
+    
+    @classmethod
+    def get_logger(cls, service_name: str, level: str = "INFO") -> logging.Logger:
         """Get configured logger for a service"""
+        logger = cls._loggers.get(service_name)
+        if logger is not None:
+            return logger
+        
         logger = logging.getLogger(service_name)
+        cls._loggers[service_name] = logger
         
         if logger.handlers:
             return logger
@@ -36,15 +44,15 @@ class ServiceLogger:
 def log_request(service_name: str, method: str, path: str, user_id: Optional[str] = None):
     """Log incoming request"""
     logger = ServiceLogger.get_logger(service_name)
-    user_info = f" [User: {user_id}]" if user_id else ""
-    logger.info(f"Request: {method} {path}{user_info}")
+    if user_id:
+        logger.info("Request: %s %s [User: %s]", method, path, user_id)
+    else:
+        logger.info("Request: %s %s", method, path)
 
 def log_response(service_name: str, path: str, status_code: int, duration_ms: float):
     """Log outgoing response"""
-    logger = ServiceLogger.get_logger(service_name)
-    logger.info(f"Response: {path} - {status_code} ({duration_ms:.2f}ms)")
+    ServiceLogger.get_logger(service_name).info("Response: %s - %s (%.2fms)", path, status_code, duration_ms)
 
 def log_service_call(service_name: str, target_service: str, operation: str):
     """Log service-to-service calls"""
-    logger = ServiceLogger.get_logger(service_name)
-    logger.info(f"Service call: {service_name} -> {target_service}: {operation}")
+    ServiceLogger.get_logger(service_name).info("Service call: %s -> %s: %s", service_name, target_service, operation)
@@ -1,7 +1,19 @@
 """Standard response format for Fleet Tracker APIs"""
 from typing import Any, Optional, Dict, List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
+import time
+
+# (unix second, ISO string) of the last formatted timestamp
+_now_iso_cache = (0, "")
+
+def _now_iso() -> str:
+    """Current UTC time as ISO 8601, formatted at most once per second"""
+    global _now_iso_cache
+    second = int(time.time())
+    if _now_iso_cache[0] != second:
+        _now_iso_cache = (second, datetime.utcfromtimestamp(second).isoformat())
+    return _now_iso_cache[1]
 
 class ApiResponse(BaseModel):
     """Standard API response format"""
@@ -10,12 +22,7 @@ class ApiResponse(BaseModel):
     data: Optional[Any] = None
     errors: Optional[List[str]] = None
     meta: Optional[Dict[str, Any]] = None
-    timestamp: datetime = datetime.utcnow()
-
-    class Config:
-        json_encoders = {
-            datetime: lambda dt: dt.isoformat()
-        }
+    timestamp: str = Field(default_factory=_now_iso)
 
 def success_response(data: Any = None, message: str = "Success", meta: Dict[str, Any] = None) -> ApiResponse:
     """Create successful response"""
@@ -2,12 +2,20 @@
 from typing import Any, Dict, Optional
 from datetime import datetime
 from pydantic import BaseModel, Field
-import uuid
+import msgspec
+import os
+
+# One encoder for every event; msgspec reuses its output buffer between calls
+_MSGPACK_ENCODER = msgspec.msgpack.Encoder()
+
+def _new_event_id() -> str:
+    """Random 128-bit event ID as 32 hex characters, without building a UUID object"""
+    return os.urandom(16).hex()
 
 class BaseEvent(BaseModel):
     """Base event class for all Fleet Tracker events"""
     
-    event_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    event_id: str = Field(default_factory=_new_event_id)
     event_type: str
     source_service: str
     timestamp: datetime = Field(default_factory=datetime.utcnow)
@@ -24,10 +32,30 @@ class BaseEvent(BaseModel):
         """Convert event to dictionary for serialization"""
         return self.dict()
     
+    @classmethod
+    def from_trusted(cls, **fields: Any) -> "BaseEvent":
+        """Build an event from already-valid fields without pydantic validation
+        
+        For hot emit paths where the service builds the payload itself, e.g.
+        ``LocationUpdatedEvent.from_trusted(event_type="location.updated", source_service="location-service", data=...)``.
+        """
+        fields.setdefault("event_id", _new_event_id())
+        fields.setdefault("timestamp", datetime.utcnow())
+        return cls.model_construct(**fields)
+    
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "BaseEvent":
         """Create event from dictionary"""
         return cls(**data)
+    
+    def to_bytes(self) -> bytes:
+        """Serialize event to MessagePack for publishing"""
+        return _MSGPACK_ENCODER.encode(self.model_dump())
+    
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "BaseEvent":
+        """Decode a MessagePack payload produced by to_bytes() into this event class"""
+        return cls.model_validate(msgspec.msgpack.decode(payload))
 
 class EventMetadata(BaseModel):
     """Event metadata for routing and processing"""
@@ -0,0 +1,17 @@
+"""Batched publishing of Fleet Tracker events to Redis streams"""
+from typing import Any, Iterable, Optional
+
+from .base_event import BaseEvent
+
+# Stream field holding the MessagePack-encoded event
+PAYLOAD_FIELD = "b"
+
+async def publish_events(redis: Any, stream: str, events: Iterable[BaseEvent], maxlen: Optional[int] = None) -> None:
+    """XADD a batch of events in one pipelined round-trip
+    
+    ``redis`` is a ``redis.asyncio.Redis`` client; maxlen trims the stream approximately.
+    """
+    async with redis.pipeline(transaction=False) as pipe:
+        for event in events:
+            pipe.xadd(stream, {PAYLOAD_FIELD: event.to_bytes()}, maxlen=maxlen, approximate=True)
+        await pipe.execute()